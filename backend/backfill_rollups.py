@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Load historical leads and listings into the analytics_rollups collection.
+
+The API server records rollups live from the moment it first starts with
+rollup support (meta.rollups.live_since). This script aggregates everything
+older than that point with $dateTrunc and adds it on top, then marks the
+backfill as done so a second run is a no-op. Run migrate_dates.py first:
+only native BSON dates are counted.
+
+Status changes before live_since are approximated from each property's
+current non-pending status and its updated_at.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+from pathlib import Path
+import os
+import sys
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+GRANULARITIES = ('day', 'week')
+
+def bucket_expr(field: str, granularity: str) -> dict:
+    """Same buckets as server.bucket_start: UTC days, weeks starting Monday."""
+    return {'$dateTrunc': {'date': f'${field}', 'unit': granularity, 'timezone': 'UTC', 'startOfWeek': 'monday'}}
+
+def leads_pipeline(cutoff: datetime, granularity: str) -> list:
+    return [
+        {'$match': {'created_at': {'$type': 'date', '$lt': cutoff}}},
+        {'$lookup': {'from': 'properties', 'localField': 'property_id', 'foreignField': 'id', 'as': 'property'}},
+        {'$group': {
+            '_id': {
+                'bucket': bucket_expr('created_at', granularity),
+                'property_type': {'$first': '$property.property_type'},
+                'status': {'$first': '$property.status'},
+            },
+            'count': {'$sum': 1},
+        }},
+    ]
+
+def listings_pipeline(cutoff: datetime, granularity: str) -> list:
+    # Every listing starts out pending
+    return [
+        {'$match': {'created_at': {'$type': 'date', '$lt': cutoff}}},
+        {'$group': {
+            '_id': {'bucket': bucket_expr('created_at', granularity), 'property_type': '$property_type', 'status': 'pending'},
+            'count': {'$sum': 1},
+        }},
+    ]
+
+def status_changes_pipeline(cutoff: datetime, granularity: str) -> list:
+    return [
+        {'$match': {'status': {'$ne': 'pending'}, 'updated_at': {'$type': 'date', '$lt': cutoff}}},
+        {'$group': {
+            '_id': {'bucket': bucket_expr('updated_at', granularity), 'property_type': '$property_type', 'status': '$status'},
+            'count': {'$sum': 1},
+        }},
+    ]
+
+SOURCES = {
+    'leads': ('leads', leads_pipeline),
+    'listings': ('properties', listings_pipeline),
+    'status_changes': ('properties', status_changes_pipeline),
+}
+
+async def backfill_rollups(db) -> dict:
+    """Add pre-cutoff history to the rollups; returns rows written per metric."""
+    state = await db.meta.find_one({'_id': 'rollups'})
+    if state and state.get('backfilled_at'):
+        print(f"ℹ️  Rollups already backfilled at {state['backfilled_at']}, nothing to do")
+        return {}
+    cutoff = state['live_since'] if state else datetime.now(timezone.utc)
+    # Claim the run first so two concurrent invocations cannot both add history
+    try:
+        await db.meta.update_one(
+            {'_id': 'rollups', 'backfill_started_at': {'$exists': False}},
+            {'$set': {'backfill_started_at': datetime.now(timezone.utc)}, '$setOnInsert': {'live_since': cutoff}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        print("⚠️  A backfill has already started (meta.rollups.backfill_started_at); aborting")
+        print("   If that run failed part-way, clear analytics_rollups history and unset the field to retry")
+        return {}
+
+    written = {}
+    for metric, (collection, pipeline) in SOURCES.items():
+        written[metric] = 0
+        for granularity in GRANULARITIES:
+            ops = [
+                UpdateOne(
+                    {'metric': metric, 'granularity': granularity, **row['_id']},
+                    {'$inc': {'count': row['count']}},
+                    upsert=True
+                )
+                async for row in db[collection].aggregate(pipeline(cutoff, granularity), allowDiskUse=True)
+            ]
+            if ops:
+                await db.analytics_rollups.bulk_write(ops, ordered=False)
+            written[metric] += len(ops)
+    await db.meta.update_one({'_id': 'rollups'}, {'$set': {'backfilled_at': datetime.now(timezone.utc)}})
+    return written
+
+async def main():
+    """Main function."""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        written = await backfill_rollups(db)
+        for metric, count in written.items():
+            print(f"✅ {metric}: {count} rollup rows")
+    except Exception as e:
+        print(f"❌ Error during rollup backfill: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
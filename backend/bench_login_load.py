@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: public listing latency while a login storm is running.
+
+Runs against a live API server (BACKEND_URL, default http://localhost:8080).
+It measures GET /api/properties latency twice: once on a quiet server, and
+once while several threads hammer POST /api/auth/login. It then prints
+p50/p95/p99 for both phases. With bcrypt on the event loop the loaded p99
+grows by roughly one hash per queued login; with the bounded pool it should
+stay close to the quiet p99.
+
+The login rate limits would answer most of the storm with 429 before any
+hashing happens; start the server with AUTH_IP_RATE=0 LOGIN_ACCOUNT_RATE=0 to
+measure the hasher itself.
+
+Usage: python3 bench_login_load.py [seconds_per_phase] [login_threads] [listing_threads]
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.environ.get("BACKEND_URL", "http://localhost:8080")
+API_URL = f"{BASE_URL}/api"
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def listing_worker(stop: threading.Event, samples: list):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = session.get(f"{API_URL}/properties", params={"status": "approved", "limit": 20})
+        elapsed = time.perf_counter() - start
+        if response.status_code == 200:
+            samples.append(elapsed * 1000)
+
+def login_worker(stop: threading.Event, credentials: dict, counts: dict):
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.post(f"{API_URL}/auth/login", json=credentials)
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+def run_phase(seconds: float, login_threads: int, listing_threads: int, credentials: dict):
+    stop = threading.Event()
+    samples, counts = [], {}
+    with ThreadPoolExecutor(max_workers=login_threads + listing_threads) as pool:
+        for _ in range(listing_threads):
+            pool.submit(listing_worker, stop, samples)
+        for _ in range(login_threads):
+            pool.submit(login_worker, stop, credentials, counts)
+        time.sleep(seconds)
+        stop.set()
+    return samples, counts
+
+def report(label: str, samples: list, counts: dict):
+    print(f"{label}: {len(samples)} listing requests")
+    print(f"   p50 {percentile(samples, 50):8.1f} ms   p95 {percentile(samples, 95):8.1f} ms   p99 {percentile(samples, 99):8.1f} ms")
+    if counts:
+        print(f"   logins by status: {dict(sorted(counts.items()))}")
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    login_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    listing_threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    credentials = {"email": f"bench_{uuid.uuid4().hex[:8]}@test.com", "password": "BenchPass123!"}
+    response = requests.post(f"{API_URL}/auth/register", json={**credentials, "name": "Bench User", "role": "client"})
+    if response.status_code != 200:
+        print(f"❌ Could not register benchmark user: {response.status_code} {response.text}")
+        return 1
+
+    print(f"🏠 Benchmarking {API_URL} ({seconds:.0f}s per phase, {login_threads} login / {listing_threads} listing threads)\n")
+    report("Quiet", *run_phase(seconds, 0, listing_threads, credentials))
+    report("Under login load", *run_phase(seconds, login_threads, listing_threads, credentials))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-row cost of serializing Mongo documents for the list endpoints.
+
+Compares the old path (return raw dicts and let FastAPI validate them against
+response_model, run jsonable_encoder and json.dumps) with the trusted
+RowSerializer path used by server.py, and checks both produce identical bytes.
+
+Usage: python3 bench_serialization.py [rows] [repeats]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import server
+
+def sample_properties(count: int) -> list:
+    """Documents shaped like seed_properties.py output, as read back from Mongo."""
+    now = server.utc_now()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Mediterranean Villa Estate - Property #{i}",
+            "description": "Stunning Mediterranean-style villa featuring panoramic ocean views. " * 6,
+            "price": 12500000.0,
+            "location": "Beverly Park, Beverly Hills, CA",
+            "latitude": 34.1107,
+            "longitude": -118.4263,
+            "bedrooms": 6,
+            "bathrooms": 7,
+            "area": 9800,
+            "property_type": "villa",
+            "images": [f"https://images.unsplash.com/photo-{n}?w=1920&q=95" for n in range(8)],
+            "status": "approved",
+            "seller_id": str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+async def fastapi_path(field, docs: list) -> bytes:
+    """What FastAPI does for `response_model=List[Property]` when a handler returns dicts."""
+    content = await serialize_response(field=field, response_content=docs)
+    return JSONResponse(content).body
+
+def trusted_path(docs: list) -> bytes:
+    return server.PropertyRows.dump_json(docs)
+
+async def timed(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    return time.perf_counter() - start
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    docs = sample_properties(rows)
+    field = create_response_field(name="response", type_=List[server.Property], mode="serialization")
+
+    before = await fastapi_path(field, docs)
+    after = trusted_path(docs)
+    print(f"Byte-identical output: {'YES' if before == after else 'NO'} ({len(after)} bytes)")
+
+    old = await timed(lambda: fastapi_path(field, docs), repeats)
+    new = await timed(lambda: trusted_path(docs), repeats)
+    per_row_old = old / repeats / rows * 1e6
+    per_row_new = new / repeats / rows * 1e6
+    print(f"{rows} rows x {repeats} repeats")
+    print(f"  FastAPI response_model : {per_row_old:8.2f} µs/row")
+    print(f"  RowSerializer          : {per_row_new:8.2f} µs/row")
+    print(f"  Speedup                : {per_row_old / per_row_new:8.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
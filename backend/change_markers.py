@@ -0,0 +1,13 @@
+"""
+Change markers for scripts that write to the database behind the API server's back.
+"""
+
+from datetime import datetime, timezone
+
+async def bump_marker(db, name: str):
+    """Advance meta.<name> so running API servers drop what they cached for that collection."""
+    await db.meta.update_one(
+        {"_id": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
@@ -11,6 +11,10 @@ from dotenv import load_dotenv
 from pathlib import Path
 import os
 
+from text_search import user_search_fields
+from change_markers import bump_marker
+from passwords import hash_password
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -30,14 +34,17 @@ async def create_admin_user():
         "email": "admin@luxestate.com",
         "name": "Admin User",
         "role": "admin",
-        "password": "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.dW8KIuJ3eHFfTi",  # "password123"
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "password": hash_password("password123"),
+        "created_at": datetime.now(timezone.utc),
+        **user_search_fields("Admin User", "admin@luxestate.com"),
     }
     await db.users.update_one(
         {"email": "admin@luxestate.com"},
         {"$set": admin},
         upsert=True
     )
+    # Let running API servers drop cached users (role may have changed)
+    await bump_marker(db, "users")
     print("✅ Admin user created successfully!")
     print(f"📧 Email: admin@luxestate.com")
     print(f"🔑 Password: password123")
@@ -6,7 +6,6 @@ Run this script locally, pointing to your Atlas connection string.
 
 import asyncio
 import uuid
-import bcrypt
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
@@ -14,18 +13,14 @@ from pathlib import Path
 import os
 import sys
 
+from text_search import user_search_fields
+from change_markers import bump_marker
+from passwords import hash_password, verify_password
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
 async def create_admin_user():
     """Create or update admin user on remote database."""
     # Get connection details
@@ -61,7 +56,8 @@ async def create_admin_user():
             "name": "Admin User",
             "role": "admin",
             "password": hashed_password,
-            "created_at": existing_admin.get("created_at", datetime.now(timezone.utc).isoformat()) if existing_admin else datetime.now(timezone.utc).isoformat()
+            "created_at": existing_admin.get("created_at", datetime.now(timezone.utc)) if existing_admin else datetime.now(timezone.utc),
+            **user_search_fields("Admin User", "admin@luxestate.com"),
         }
         
         if existing_admin:
@@ -76,6 +72,9 @@ async def create_admin_user():
             await db.users.insert_one(admin_data)
             print("✅ Admin user created successfully!")
         
+        # Let running API servers drop cached users (role may have changed)
+        await bump_marker(db, "users")
+        
         # Verify it works
         admin = await db.users.find_one({'email': 'admin@luxestate.com'})
         test_verify = verify_password(password, admin['password'])
@@ -5,13 +5,15 @@ Fix admin user password by properly hashing it with bcrypt.
 
 import asyncio
 import uuid
-import bcrypt
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 
+from text_search import user_search_fields
+from passwords import hash_password, verify_password
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,10 +25,6 @@ DB_NAME = os.environ['DB_NAME']
 client = AsyncIOMotorClient(MONGO_URL)
 db = client[DB_NAME]
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
 async def fix_admin_password():
     """Update admin user with properly hashed password."""
     password = "password123"
@@ -51,7 +49,8 @@ async def fix_admin_password():
             "name": "Admin User",
             "role": "admin",
             "password": hashed_password,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            **user_search_fields("Admin User", "admin@luxestate.com"),
         }
         await db.users.update_one(
             {"email": "admin@luxestate.com"},
@@ -62,7 +61,7 @@ async def fix_admin_password():
     
     # Verify it works
     admin = await db.users.find_one({'email': 'admin@luxestate.com'}, {'_id': 0})
-    test_verify = bcrypt.checkpw(password.encode('utf-8'), admin['password'].encode('utf-8'))
+    test_verify = verify_password(password, admin['password'])
     
     print(f"📧 Email: admin@luxestate.com")
     print(f"🔑 Password: password123")
@@ -0,0 +1,111 @@
+"""
+Bundled gazetteer: coordinates for the markets Luxestate lists in, shared by
+the API server and the seeding scripts. Lookups never leave the process.
+"""
+
+from text_search import normalize_text
+
+# city -> ((latitude, longitude), {neighborhood: (latitude, longitude)})
+CITIES = {
+    "Beverly Hills, CA": ((34.0736, -118.4004), {
+        "Beverly Hills": (34.0736, -118.4004),
+        "The Flats": (34.0761, -118.4050),
+        "Beverly Park": (34.1107, -118.4263),
+        "Mulholland Drive": (34.1300, -118.4200),
+    }),
+    "Miami, FL": ((25.7617, -80.1918), {
+        "Miami Beach": (25.7907, -80.1300),
+        "Coconut Grove": (25.7126, -80.2570),
+        "Coral Gables": (25.7215, -80.2684),
+        "Key Biscayne": (25.6937, -80.1628),
+    }),
+    "New York, NY": ((40.7128, -74.0060), {
+        "Tribeca": (40.7163, -74.0086),
+        "SoHo": (40.7233, -74.0030),
+        "Upper East Side": (40.7736, -73.9566),
+        "Chelsea": (40.7465, -74.0014),
+    }),
+    "Malibu, CA": ((34.0259, -118.7798), {
+        "Malibu Colony": (34.0326, -118.6953),
+        "Carbon Beach": (34.0365, -118.6536),
+        "Broad Beach": (34.0330, -118.8480),
+        "Point Dume": (34.0011, -118.8065),
+    }),
+    "San Francisco, CA": ((37.7749, -122.4194), {
+        "Pacific Heights": (37.7925, -122.4382),
+        "Marina District": (37.8030, -122.4370),
+        "Russian Hill": (37.8011, -122.4194),
+        "Sea Cliff": (37.7873, -122.4900),
+    }),
+    "Los Angeles, CA": ((34.0522, -118.2437), {
+        "Bel Air": (34.1002, -118.4595),
+        "Holmby Hills": (34.0776, -118.4182),
+        "Brentwood": (34.0597, -118.4757),
+        "Westwood": (34.0635, -118.4455),
+    }),
+    "Aspen, CO": ((39.1911, -106.8175), {
+        "Aspen Mountain": (39.1780, -106.8210),
+        "Red Mountain": (39.2040, -106.8100),
+        "Smuggler": (39.2000, -106.8000),
+        "West End": (39.1940, -106.8270),
+    }),
+    "Hamptons, NY": ((40.9290, -72.3040), {
+        "East Hampton": (40.9634, -72.1848),
+        "Southampton": (40.8843, -72.3895),
+        "Montauk": (41.0359, -71.9545),
+        "Sagaponack": (40.9229, -72.2759),
+    }),
+    "Palm Beach, FL": ((26.7056, -80.0364), {
+        "Palm Beach": (26.7056, -80.0364),
+        "Manalapan": (26.5695, -80.0434),
+        "Ocean Ridge": (26.5270, -80.0484),
+        "Hypoluxo": (26.5662, -80.0534),
+    }),
+    "Montecito, CA": ((34.4367, -119.6321), {
+        "Lower Village": (34.4210, -119.6410),
+        "Upper Village": (34.4370, -119.6320),
+        "Cold Spring": (34.4600, -119.6500),
+        "San Ysidro": (34.4456, -119.6069),
+    }),
+}
+
+def _build_places() -> dict:
+    # "Neighborhood, City, ST" and "City, ST" are always keys; a bare city or
+    # neighborhood name is added only while it stays unambiguous
+    places, bare = {}, {}
+    for city, (city_point, neighborhoods) in CITIES.items():
+        places[normalize_text(city)] = city_point
+        bare.setdefault(normalize_text(city.split(',')[0]), set()).add(city_point)
+        for name, point in neighborhoods.items():
+            places[normalize_text(f"{name}, {city}")] = point
+            bare.setdefault(normalize_text(name), set()).add(point)
+    for name, points in bare.items():
+        if len(points) == 1 and name not in places:
+            places[name] = points.pop()
+    return places
+
+PLACES = _build_places()
+
+def geocode(location: str):
+    """(latitude, longitude) of the most specific known place in `location`, or None."""
+    parts = [normalize_text(part) for part in (location or '').split(',')]
+    parts = [part for part in parts if part]
+    for i in range(len(parts)):
+        point = PLACES.get(' '.join(parts[i:]))
+        if point:
+            return point
+    # "Tribeca" or "Malibu" on their own, or a trailing country or zip code
+    for part in parts:
+        if part in PLACES:
+            return PLACES[part]
+    return None
+
+def geo_fields(latitude, longitude) -> dict:
+    """Stored coordinates plus the GeoJSON point the 2dsphere index reads."""
+    if latitude is None or longitude is None:
+        return {'latitude': None, 'longitude': None, 'geo': None}
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'geo': {'type': 'Point', 'coordinates': [longitude, latitude]},
+    }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Convert ISO-string created_at/updated_at fields to native BSON dates.
+
+The API server runs the same conversion in the background at startup
+(backfill_dates); run this ahead of a deploy to have it finished before the
+new release serves traffic.
+
+Safe to run against a live database and to re-run: only documents whose
+field is still a string are touched, and each update is conditional on the
+value it read, so a concurrent write is never overwritten.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from pathlib import Path
+import os
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+DATE_FIELDS = {
+    'users': ['created_at'],
+    'properties': ['created_at', 'updated_at'],
+    'leads': ['created_at'],
+}
+
+BATCH_SIZE = 1000
+
+def parse_date(value: str) -> datetime:
+    """Parse an ISO timestamp written by .isoformat(); naive values are UTC."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+async def migrate_field(db, collection: str, field: str) -> int:
+    """Convert one field across a collection in batches; returns the number of documents updated."""
+    cursor = db[collection].find({field: {'$type': 'string'}}, {'_id': 1, field: 1})
+    batch, converted = [], 0
+    async for doc in cursor:
+        try:
+            value = parse_date(doc[field])
+        except ValueError:
+            print(f"⚠️  {collection}.{field}: unparseable value {doc[field]!r} on {doc['_id']}, skipped")
+            continue
+        batch.append(UpdateOne({'_id': doc['_id'], field: doc[field]}, {'$set': {field: value}}))
+        if len(batch) >= BATCH_SIZE:
+            result = await db[collection].bulk_write(batch, ordered=False)
+            converted += result.modified_count
+            batch = []
+    if batch:
+        result = await db[collection].bulk_write(batch, ordered=False)
+        converted += result.modified_count
+    return converted
+
+async def migrate_dates(db) -> dict:
+    """Migrate every date field in DATE_FIELDS."""
+    counts = {}
+    for collection, fields in DATE_FIELDS.items():
+        for field in fields:
+            counts[f'{collection}.{field}'] = await migrate_field(db, collection, field)
+    return counts
+
+async def main():
+    """Main function."""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        counts = await migrate_dates(db)
+        for name, count in counts.items():
+            print(f"✅ {name}: converted {count} documents")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
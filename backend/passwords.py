@@ -0,0 +1,24 @@
+"""
+bcrypt hashing shared by the API server and the admin/seed scripts.
+"""
+
+import os
+
+import bcrypt
+
+def default_rounds() -> int:
+    """Cost for hashes written outside the server: its pinned BCRYPT_ROUNDS, else 12.
+
+    Read on each call so a script's load_dotenv() is honoured. An unpinned
+    server calibrates its own cost and rehashes on the next login anyway.
+    """
+    return int(os.environ.get('BCRYPT_ROUNDS') or 12)
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """Hash password using bcrypt."""
+    salt = bcrypt.gensalt(rounds=rounds or default_rounds())
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verify password against hash."""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
@@ -9,10 +9,16 @@ import random
 import uuid
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 
+from text_search import location_fields, user_search_fields
+from gazetteer import geocode, geo_fields
+from change_markers import bump_marker
+from passwords import hash_password
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -344,6 +350,7 @@ def create_property(property_type, template, location, seller_id):
     
     neighborhood = random.choice(location["neighborhoods"])
     full_location = f"{neighborhood}, {location['city']}"
+    latitude, longitude = geocode(full_location) or (None, None)
     
     # Generate 8 high-quality images per property
     images = generate_property_images(property_type, 8)
@@ -365,27 +372,31 @@ def create_property(property_type, template, location, seller_id):
         "images": images,
         "status": "approved",
         "seller_id": seller_id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        **location_fields(full_location),
+        **geo_fields(latitude, longitude),
     }
 
 async def create_admin_user():
     """Create an admin user for the application."""
     admin_id = str(uuid.uuid4())
     admin = {
-        "id": admin_id,
         "email": "admin@luxestate.com",
         "name": "Admin User",
         "role": "admin",
-        "password": "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.dW8KIuJ3eHFfTi",  # "password123"
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "password": hash_password("password123"),
+        "created_at": datetime.now(timezone.utc),
+        **user_search_fields("Admin User", "admin@luxestate.com"),
     }
-    await db.users.update_one(
-        {"id": admin_id, "email": "admin@luxestate.com"},
-        {"$set": admin},
-        upsert=True
+    # Key on email (unique index) so re-seeding reuses the existing admin
+    result = await db.users.find_one_and_update(
+        {"email": "admin@luxestate.com"},
+        {"$set": admin, "$setOnInsert": {"id": admin_id}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
-    return admin_id
+    return result["id"]
 
 async def create_seller_users(count=5):
     """Create sample seller users for the properties."""
@@ -398,22 +409,25 @@ async def create_seller_users(count=5):
         "Urban Luxury Brokers"
     ]
     
+    password = hash_password("password123")
+    
     for i in range(count):
         seller_id = str(uuid.uuid4())
         seller = {
-            "id": seller_id,
             "email": f"seller{i+1}@luxestate.com",
             "name": seller_names[i],
             "role": "seller",
-            "password": "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.dW8KIuJ3eHFfTi",  # "password123"
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "password": password,
+            "created_at": datetime.now(timezone.utc),
+            **user_search_fields(seller_names[i], f"seller{i+1}@luxestate.com"),
         }
-        await db.users.update_one(
-            {"id": seller_id},
-            {"$set": seller},
-            upsert=True
+        result = await db.users.find_one_and_update(
+            {"email": seller["email"]},
+            {"$set": seller, "$setOnInsert": {"id": seller_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
-        sellers.append(seller_id)
+        sellers.append(result["id"])
     
     return sellers
 
@@ -430,6 +444,9 @@ async def seed_properties():
     print("Creating seller users...")
     sellers = await create_seller_users(5)
     
+    # Let running API servers drop cached users (role may have changed)
+    await bump_marker(db, "users")
+    
     # Property type distribution
     property_distribution = {
         "villa": 15,
@@ -482,6 +499,11 @@ async def seed_properties():
             upsert=True
         )
     
+    # Retire listing ETags handed out by a running API server
+    await bump_marker(db, "properties")
+    # Analytics counters are recounted on the next read
+    await db.meta.delete_one({"_id": "analytics"})
+    
     print(f"✅ Successfully seeded {len(properties_to_insert)} luxury properties!")
     print(f"📍 Properties include villas, penthouses, mansions, estates, and apartments")
     print(f"🏙️ Located in top markets: Beverly Hills, Miami, NYC, Malibu, and more")
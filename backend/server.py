@@ -1,23 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, ValidationError
+from typing import List, Optional, Union
+from typing_extensions import TypedDict
+from collections import OrderedDict
 import uuid
+import time
+import json
+import base64
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import jwt
+import re
+import math
+import csv
+import io
+import fcntl
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from text_search import normalize_text, location_fields, user_search_fields, InvertedIndex
+from passwords import hash_password, verify_password
+from gazetteer import geocode, geo_fields
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: dates come back as UTC-aware datetimes and serialize with a 'Z' suffix
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 app = FastAPI()
@@ -32,6 +52,87 @@ security = HTTPBearer()
 JWT_SECRET = os.environ.get('JWT_SECRET', 'luxestate-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 
+# Internal search and lease fields never leave the API
+USER_PROJECTION = {'_id': 0, 'password': 0, 'search_terms': 0}
+PROPERTY_PROJECTION = {'_id': 0, 'location_norm': 0, 'location_tokens': 0, 'geo': 0, 'lease_owner': 0, 'lease_until': 0}
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+
+NDJSON = 'application/x-ndjson'
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+
+LISTING_CACHE_SIZE = int(os.environ.get('LISTING_CACHE_SIZE', 256))
+LISTING_CACHE_TTL = float(os.environ.get('LISTING_CACHE_TTL', 30))
+# Lower bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = [0, 1000000, 2500000, 5000000, 10000000, 25000000]
+
+ANALYTICS_RECONCILE_INTERVAL = float(os.environ.get('ANALYTICS_RECONCILE_INTERVAL', 3600))
+
+CHANGE_MARKER_TTL = float(os.environ.get('CHANGE_MARKER_TTL', 2))
+
+# Full-text sync re-reads properties updated this many seconds before the last
+# one it saw, covering writers whose clocks or commits lag slightly
+TEXT_INDEX_SYNC_LAG = float(os.environ.get('TEXT_INDEX_SYNC_LAG', 5))
+
+# Resolved users are reused for up to USER_CACHE_TTL seconds; a role or user
+# change elsewhere shows up within CHANGE_MARKER_TTL
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+
+# Verified token claims are reused until TOKEN_CACHE_TTL or the token's own exp,
+# whichever comes first
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 300))
+
+# bcrypt runs on its own small pool so a login storm queues there instead of
+# blocking the event loop; beyond the queue limit callers get a fast 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+
+# Token-bucket limits, in requests per minute with a burst allowance. Client
+# IPs come from the socket unless TRUST_FORWARDED_FOR is set, in which case
+# the address the nearest proxy appended to X-Forwarded-For is used
+AUTH_IP_RATE = float(os.environ.get('AUTH_IP_RATE', 30))
+AUTH_IP_BURST = float(os.environ.get('AUTH_IP_BURST', 10))
+LOGIN_ACCOUNT_RATE = float(os.environ.get('LOGIN_ACCOUNT_RATE', 10))
+LOGIN_ACCOUNT_BURST = float(os.environ.get('LOGIN_ACCOUNT_BURST', 5))
+LEAD_IP_RATE = float(os.environ.get('LEAD_IP_RATE', 20))
+LEAD_IP_BURST = float(os.environ.get('LEAD_IP_BURST', 5))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 50000))
+TRUST_FORWARDED_FOR = os.environ.get('TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+
+# Bulk property import: items per request and per insert_many batch
+BULK_IMPORT_MAX_ITEMS = int(os.environ.get('BULK_IMPORT_MAX_ITEMS', 10000))
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 500))
+# Moderation queue leases: how long claimed items stay reserved, and how many
+# a moderator can claim per call
+MODERATION_LEASE_SECONDS = float(os.environ.get('MODERATION_LEASE_SECONDS', 300))
+MODERATION_CLAIM_MAX = int(os.environ.get('MODERATION_CLAIM_MAX', 100))
+# Bulk moderation reads and updates matching properties this many at a time
+BULK_STATUS_BATCH_SIZE = int(os.environ.get('BULK_STATUS_BATCH_SIZE', 1000))
+
+# Write-behind lead ingestion: POST /api/leads answers once the lead is in the
+# local spool and batches the Mongo writes (see LeadBuffer)
+LEAD_WRITE_BEHIND = os.environ.get('LEAD_WRITE_BEHIND', 'false').lower() == 'true'
+LEAD_BATCH_SIZE = int(os.environ.get('LEAD_BATCH_SIZE', 200))
+LEAD_FLUSH_INTERVAL = float(os.environ.get('LEAD_FLUSH_INTERVAL', 1))
+LEAD_SPOOL_DIR = Path(os.environ.get('LEAD_SPOOL_DIR', ROOT_DIR / 'spool'))
+LEAD_SPOOL_FSYNC = os.environ.get('LEAD_SPOOL_FSYNC', 'false').lower() == 'true'
+
+# bcrypt cost: BCRYPT_ROUNDS pins it; otherwise the first process to start
+# picks the highest cost whose verify fits in BCRYPT_TARGET_MS on its host and
+# records it in meta.bcrypt for the others. Delete that document to recalibrate
+BCRYPT_ROUNDS = int(os.environ['BCRYPT_ROUNDS']) if os.environ.get('BCRYPT_ROUNDS') else None
+BCRYPT_TARGET_MS = float(os.environ.get('BCRYPT_TARGET_MS', 250))
+BCRYPT_MIN_ROUNDS = int(os.environ.get('BCRYPT_MIN_ROUNDS', 12))
+BCRYPT_MAX_ROUNDS = int(os.environ.get('BCRYPT_MAX_ROUNDS', 16))
+
+def utc_now() -> datetime:
+    # BSON dates hold milliseconds; truncate so responses match what is stored
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 # Models
 class UserRole(str):
     ADMIN = 'admin'
@@ -44,7 +145,7 @@ class User(BaseModel):
     email: EmailStr
     name: str
     role: str = 'client'
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -67,6 +168,8 @@ class Property(BaseModel):
     description: str
     price: float
     location: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     bedrooms: int
     bathrooms: int
     area: float
@@ -74,14 +177,17 @@ class Property(BaseModel):
     images: List[str]
     status: str = 'pending'
     seller_id: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
 class PropertyCreate(BaseModel):
     title: str
     description: str
     price: float
     location: str
+    # Looked up in the bundled gazetteer when omitted
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     bedrooms: int
     bathrooms: int
     area: float
@@ -91,6 +197,51 @@ class PropertyCreate(BaseModel):
 class PropertyUpdate(BaseModel):
     status: str
 
+class PropertyFilter(BaseModel):
+    status: Optional[str] = None
+    property_type: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    bedrooms: Optional[int] = None
+    location: Optional[str] = None
+
+class BulkStatusUpdate(BaseModel):
+    status: str
+    ids: Optional[List[str]] = None
+    filter: Optional[PropertyFilter] = None
+
+class BulkStatusResult(BaseModel):
+    status: str
+    changed: int
+    ids: List[str]
+
+class ModerationRelease(BaseModel):
+    ids: Optional[List[str]] = None
+
+# Sparse fieldsets (`fields=`): only the requested keys are set and serialized
+class PropertySparse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[int] = None
+    area: Optional[float] = None
+    property_type: Optional[str] = None
+    images: Optional[List[str]] = None
+    cover_image: Optional[str] = None
+    status: Optional[str] = None
+    seller_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class PropertyNear(Property):
+    distance: float
+
 class Lead(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -99,7 +250,7 @@ class Lead(BaseModel):
     email: EmailStr
     phone: str
     message: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class LeadCreate(BaseModel):
     property_id: str
@@ -108,6 +259,56 @@ class LeadCreate(BaseModel):
     phone: str
     message: str
 
+class RollupPoint(BaseModel):
+    bucket: datetime
+    property_type: Optional[str] = None
+    status: Optional[str] = None
+    count: int
+
+class RollupSeries(BaseModel):
+    metric: str
+    granularity: str
+    start: datetime
+    end: datetime
+    points: List[RollupPoint]
+
+class FacetCount(BaseModel):
+    value: Union[str, int]
+    count: int
+
+class PriceBucket(BaseModel):
+    min: float
+    max: Optional[float] = None
+    count: int
+
+class PropertyFacets(BaseModel):
+    total: int
+    property_type: List[FacetCount]
+    bedrooms: List[FacetCount]
+    status: List[FacetCount]
+    price: List[PriceBucket]
+
+class IndexAuditEntry(BaseModel):
+    route: str
+    collection: str
+    filter: dict
+    sort: Optional[List[List]] = None
+    covered: bool
+    blocking_sort: bool
+    indexes_used: List[str]
+    stages: List[str]
+
+class IndexFailure(BaseModel):
+    collection: str
+    index: str
+    error: str
+
+class IndexReport(BaseModel):
+    indexes: dict
+    queries: List[IndexAuditEntry]
+    uncovered: int
+    failed: List[IndexFailure] = []
+
 class Analytics(BaseModel):
     total_properties: int
     approved_properties: int
@@ -115,12 +316,147 @@ class Analytics(BaseModel):
     total_users: int
     total_leads: int
 
+# Trusted serialization for documents read back from Mongo. Rows were
+# validated on the way in, so instead of validating them again (and letting
+# FastAPI re-encode them through jsonable_encoder) they are put in model
+# field order and handed straight to pydantic-core's serializer as
+# TypedDicts. The output is byte-identical to serializing List[Model].
+class RowSerializer:
+    def __init__(self, model, fill_defaults: bool = True):
+        self.fields = tuple(model.model_fields)
+        # Keys a row may omit, filled in as validating against the model would;
+        # sparse rows leave them out since only the requested keys are sent
+        self.defaults = {name: field for name, field in model.model_fields.items() if fill_defaults and not field.is_required()}
+        row = TypedDict(f'{model.__name__}Row', {name: field.annotation for name, field in model.model_fields.items()}, total=False)
+        self._row = TypeAdapter(row)
+        self._rows = TypeAdapter(List[row])
+    
+    def _order(self, doc: dict) -> dict:
+        return {
+            name: doc[name] if name in doc else self.defaults[name].get_default(call_default_factory=True)
+            for name in self.fields
+            if name in doc or name in self.defaults
+        }
+    
+    def dump_row(self, doc: dict) -> bytes:
+        return self._row.dump_json(self._order(doc))
+    
+    def dump_json(self, docs: list) -> bytes:
+        return self._rows.dump_json([self._order(doc) for doc in docs])
+
+PropertyRows = RowSerializer(Property)
+PropertySparseRows = RowSerializer(PropertySparse, fill_defaults=False)
+PropertyNearRows = RowSerializer(PropertyNear)
+LeadRows = RowSerializer(Lead)
+UserRows = RowSerializer(User)
+
+def json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    return Response(content=body, media_type='application/json', headers=headers)
+
 # Auth helpers
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def hash_rounds(hashed: str) -> Optional[int]:
+    # $2b$12$<salt+hash>
+    parts = hashed.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    # Each extra round doubles the cost, so one timing at the floor is enough
+    # to extrapolate; best of three keeps a noisy sample from skewing it
+    sample = hash_password('calibration', min_rounds)
+    elapsed = []
+    for _ in range(3):
+        started = time.perf_counter()
+        verify_password('calibration', sample)
+        elapsed.append(time.perf_counter() - started)
+    rounds = min_rounds
+    cost_ms = min(elapsed) * 1000
+    while rounds < max_rounds and cost_ms * 2 <= target_ms:
+        rounds += 1
+        cost_ms *= 2
+    return rounds
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, rounds: Optional[int] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds or BCRYPT_MIN_ROUNDS
+        self.calibrated = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    async def _run(self, fn, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail='Authentication is busy, retry shortly', headers={'Retry-After': '1'})
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.perf_counter()
+        
+        def job():
+            started = time.perf_counter()
+            return fn(*args), started, time.perf_counter()
+        
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self.wait_seconds += started - submitted
+        self.run_seconds += finished - started
+        return result
+    
+    async def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int):
+        self.rounds = await asyncio.get_running_loop().run_in_executor(
+            self._executor, calibrate_rounds, target_ms, min_rounds, max_rounds
+        )
+        self.calibrated = True
+    
+    async def share_rounds(self, meta):
+        # The first replica to calibrate records its cost; the rest adopt it
+        # so every replica writes hashes at the same cost
+        await meta.update_one({'_id': 'bcrypt'}, {'$setOnInsert': {'rounds': self.rounds}}, upsert=True)
+        doc = await meta.find_one({'_id': 'bcrypt'})
+        if doc and isinstance(doc.get('rounds'), int):
+            self.rounds = doc['rounds']
+    
+    def needs_rehash(self, hashed: str) -> bool:
+        # Only ever upgrade: a replica that settled on a lower cost must not
+        # undo the work of one that settled higher
+        rounds = hash_rounds(hashed)
+        return rounds is None or rounds < self.rounds
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+    
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> dict:
+        return {
+            'rounds': self.rounds,
+            'calibrated': self.calibrated,
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': min(self.pending, self.workers),
+            'queued': max(0, self.pending - self.workers),
+            'peak_pending': self.peak_pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_ms': self.wait_seconds / self.completed * 1000 if self.completed else 0.0,
+            'avg_run_ms': self.run_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE, BCRYPT_ROUNDS)
 
 def create_token(user_id: str) -> str:
     payload = {
@@ -132,20 +468,1041 @@ def create_token(user_id: str) -> str:
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get('user_id')
-        user_doc = await db.users.find_one({'id': user_id}, {'_id': 0})
-        if not user_doc:
+        payload = decode_token(token)
+        user = await load_user(payload.get('user_id'))
+        if not user:
             raise HTTPException(status_code=401, detail='User not found')
-        return User(**user_doc)
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail='Token expired')
     except Exception:
         raise HTTPException(status_code=401, detail='Invalid token')
 
+# Query helpers
+def build_property_query(
+    status: Optional[str] = None,
+    property_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    bedrooms: Optional[int] = None,
+    location: Optional[str] = None
+) -> dict:
+    query = {}
+    if status:
+        query['status'] = status
+    if property_type:
+        query['property_type'] = property_type
+    if min_price is not None:
+        query['price'] = query.get('price', {})
+        query['price']['$gte'] = min_price
+    if max_price is not None:
+        query['price'] = query.get('price', {})
+        query['price']['$lte'] = max_price
+    if bedrooms is not None:
+        query['bedrooms'] = bedrooms
+    if location:
+        query.update(location_query(location))
+    return query
+
+def build_lead_query(
+    property_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+) -> dict:
+    query = {}
+    if property_id:
+        query['property_id'] = property_id
+    if created_after is not None:
+        query['created_at'] = query.get('created_at', {})
+        query['created_at']['$gte'] = created_after
+    if created_before is not None:
+        query['created_at'] = query.get('created_at', {})
+        query['created_at']['$lt'] = created_before
+    return query
+
+USER_ROLES = [UserRole.ADMIN, UserRole.SELLER, UserRole.CLIENT]
+
+def user_search_query(q: str) -> dict:
+    # Anchored prefixes on the multikey search_terms index: the raw lowercase
+    # input matches emails, the normalized form matches names and name words
+    prefixes = {q.strip().lower(), normalize_text(q)}
+    prefixes.discard('')
+    if not prefixes:
+        return {}
+    return {'search_terms': {'$in': [re.compile('^' + re.escape(prefix)) for prefix in sorted(prefixes)]}}
+
+def location_query(location: str) -> dict:
+    # Every query word must prefix a location token (anchored regex on the
+    # indexed multikey field); multi-word input must also appear as a phrase.
+    norm = normalize_text(location)
+    tokens = norm.split()
+    if not tokens:
+        return {}
+    clauses = [{'location_tokens': {'$regex': '^' + re.escape(token)}} for token in tokens]
+    if len(tokens) > 1:
+        clauses.append({'location_norm': {'$regex': '(^| )' + re.escape(norm)}})
+    return {'$and': clauses}
+
+# Facets are disjunctive: each one is counted with every filter except its
+# own, so picking a property type still shows what the other types offer.
+FACET_FILTERS = {
+    'property_type': ('property_type',),
+    'bedrooms': ('bedrooms',),
+    'status': ('status',),
+    'price': ('min_price', 'max_price'),
+}
+
+def facet_pipeline(filters: dict) -> list:
+    owned = {key for keys in FACET_FILTERS.values() for key in keys}
+    
+    def match(excluded: tuple = ()) -> dict:
+        return build_property_query(**{key: value for key, value in filters.items() if key in owned and key not in excluded})
+    
+    def count_by(field: str) -> list:
+        return [
+            {'$match': match(FACET_FILTERS[field])},
+            {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            {'$sort': {'_id': 1}},
+        ]
+    
+    # Only the filters no facet owns can narrow the input for all branches
+    shared = {key: value for key, value in filters.items() if key not in owned}
+    return [
+        {'$match': build_property_query(**shared)},
+        {'$project': {'_id': 0, 'property_type': 1, 'bedrooms': 1, 'status': 1, 'price': 1}},
+        {'$facet': {
+            'total': [{'$match': match()}, {'$count': 'count'}],
+            'property_type': count_by('property_type'),
+            'bedrooms': count_by('bedrooms'),
+            'status': count_by('status'),
+            'price': [
+                {'$match': match(FACET_FILTERS['price'])},
+                {'$bucket': {'groupBy': '$price', 'boundaries': PRICE_BUCKETS, 'default': PRICE_BUCKETS[-1], 'output': {'count': {'$sum': 1}}}},
+            ],
+        }},
+    ]
+
+def facets_from_result(result: dict) -> PropertyFacets:
+    def counts(rows: list) -> List[FacetCount]:
+        return [FacetCount(value=row['_id'], count=row['count']) for row in rows if row['_id'] is not None]
+    
+    upper = dict(zip(PRICE_BUCKETS, PRICE_BUCKETS[1:]))
+    return PropertyFacets(
+        total=result['total'][0]['count'] if result['total'] else 0,
+        property_type=counts(result['property_type']),
+        bedrooms=counts(result['bedrooms']),
+        status=counts(result['status']),
+        price=[
+            PriceBucket(min=row['_id'], max=upper.get(row['_id']), count=row['count'])
+            for row in result['price']
+        ]
+    )
+
+def parse_fields(fields: Optional[str]) -> Optional[frozenset]:
+    if not fields:
+        return None
+    names = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    unknown = names - set(PropertySparse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return names | {'id'}
+
+def sparse_projection(names: frozenset, extra: tuple = ()) -> dict:
+    # `extra` keeps keyset sort keys in the documents; shape_sparse drops them again
+    projection = {'_id': 0}
+    for name in names | set(extra):
+        if name != 'cover_image':
+            projection[name] = 1
+    if 'cover_image' in names and 'images' not in projection:
+        projection['images'] = {'$slice': 1}
+    return projection
+
+def shape_sparse(doc: dict, names: frozenset) -> dict:
+    if 'cover_image' in names:
+        images = doc.get('images') or []
+        doc['cover_image'] = images[0] if images else None
+    return {key: value for key, value in doc.items() if key in names}
+
+# Keyset pagination. Every sort ends on the unique `id` so the ordering is
+# total and a page boundary never shifts when new documents are inserted.
+PROPERTY_SORTS = {
+    'newest': [('created_at', -1), ('id', -1)],
+    'oldest': [('created_at', 1), ('id', 1)],
+    'price_asc': [('price', 1), ('id', 1)],
+    'price_desc': [('price', -1), ('id', -1)],
+    'area_asc': [('area', 1), ('id', 1)],
+    'area_desc': [('area', -1), ('id', -1)],
+}
+# Leads and users page by creation time
+CREATED_SORTS = {
+    'newest': [('created_at', -1), ('id', -1)],
+    'oldest': [('created_at', 1), ('id', 1)],
+}
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return value
+
+def _from_cursor_value(value):
+    if isinstance(value, dict) and list(value) == ['$date'] and isinstance(value['$date'], str):
+        return datetime.fromisoformat(value['$date'])
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    # Anything else would reach the keyset query as an operator or sub-document
+    raise ValueError('cursor values must be scalars or dates')
+
+def encode_cursor(sort_spec: list, doc: dict) -> str:
+    payload = {
+        'k': [field for field, _ in sort_spec],
+        'v': [_cursor_value(doc.get(field)) for field, _ in sort_spec],
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(sort_spec: list, cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    if not isinstance(payload, dict) or payload.get('k') != [field for field, _ in sort_spec]:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    values = payload.get('v')
+    if not isinstance(values, list) or len(values) != len(sort_spec):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    try:
+        return [_from_cursor_value(value) for value in values]
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+def keyset_query(sort_spec: list, values: list) -> dict:
+    # (a, b) after (x, y)  <=>  a > x OR (a == x AND b > y), per direction
+    clauses = []
+    for i, (field, direction) in enumerate(sort_spec):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort_spec[:i])}
+        clause[field] = {'$gt' if direction == 1 else '$lt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+def keyset_find(collection, query: dict, sort_spec: list, cursor: Optional[str], projection: dict):
+    if cursor:
+        query = {'$and': [query, keyset_query(sort_spec, decode_cursor(sort_spec, cursor))]}
+    return collection.find(query, projection).sort(sort_spec)
+
+async def paginate(collection, query: dict, sort_spec: list, cursor: Optional[str], limit: int, projection: dict):
+    docs = await keyset_find(collection, query, sort_spec, cursor, projection).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(sort_spec, docs[-1])
+    return docs, next_cursor
+
+# Streaming mode. Clients sending `Accept: application/x-ndjson` get one JSON
+# document per line, written batch by batch as the Motor cursor yields them.
+# Endpoints that negotiate this way send Vary: Accept on both forms so a
+# shared cache never hands one client's format to the other.
+VARY_ACCEPT = {'Vary': 'Accept'}
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get('accept', '')
+
+async def _ndjson_lines(cursor, serializer: RowSerializer, shape=None):
+    while True:
+        batch = await cursor.to_list(STREAM_BATCH_SIZE)
+        if not batch:
+            break
+        if shape:
+            batch = [shape(doc) for doc in batch]
+        yield b''.join(serializer.dump_row(doc) + b'\n' for doc in batch)
+
+def ndjson_response(cursor, serializer: RowSerializer, shape=None, headers: Optional[dict] = None) -> StreamingResponse:
+    return StreamingResponse(_ndjson_lines(cursor.batch_size(STREAM_BATCH_SIZE), serializer, shape), media_type=NDJSON, headers=headers)
+
+# CSV export. Lead fields are public input, so cells that a spreadsheet would
+# evaluate as a formula are prefixed with a quote; phone-like values such as
+# +1 555 0100 are left alone.
+LEAD_CSV_COLUMNS = list(Lead.model_fields)
+CSV_FORMULA = re.compile(r'^(?:[=@\t\r]|[+-](?![\d\s().-]*$))')
+
+def csv_cell(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = '' if value is None else str(value)
+    return "'" + text if CSV_FORMULA.match(text) else text
+
+async def _csv_lines(cursor, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    while True:
+        batch = await cursor.to_list(STREAM_BATCH_SIZE)
+        for doc in batch:
+            writer.writerow([csv_cell(doc.get(column)) for column in columns])
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if not batch:
+            break
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire after `ttl` seconds."""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key, value, ttl: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+# Listing response cache. Entries hold the serialized page keyed on the
+# normalized filter set; a property write from this worker drops exactly the
+# entries whose filters match the document before or after the write, and a
+# marker version this worker did not produce drops them all.
+def property_matches(filters: dict, doc: dict) -> bool:
+    if filters.get('status') and doc.get('status') != filters['status']:
+        return False
+    if filters.get('property_type') and doc.get('property_type') != filters['property_type']:
+        return False
+    if filters.get('min_price') is not None and not doc.get('price', 0) >= filters['min_price']:
+        return False
+    if filters.get('max_price') is not None and not doc.get('price', 0) <= filters['max_price']:
+        return False
+    if filters.get('bedrooms') is not None and doc.get('bedrooms') != filters['bedrooms']:
+        return False
+    if filters.get('location'):
+        fields = location_fields(doc.get('location', ''))
+        norm = filters['location']
+        if not all(any(token.startswith(word) for token in fields['location_tokens']) for word in norm.split()):
+            return False
+        if ' ' in norm and not re.search('(^| )' + re.escape(norm), fields['location_norm']):
+            return False
+    return True
+
+class ListingCache(TTLCache):
+    # Values are {'filters', 'body', 'next_cursor'}. `version` is the property
+    # marker version the entries agree with: this worker's own writes drop
+    # the entries they match and then advance it, while any other new
+    # version means someone else wrote, and everything goes.
+    precise_limit = 512
+    
+    def __init__(self, max_entries: int, ttl: float):
+        super().__init__(max_entries, ttl)
+        self.generation = 0
+        self.version = None
+    
+    def clear(self):
+        self.generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+    
+    def sync(self, version: int):
+        # Call with the current marker version before reading
+        if version != self.version:
+            if self.version is not None:
+                self.clear()
+            self.version = version
+    
+    def advance(self, version: int):
+        # Call with the version this worker's own marker bump returned
+        if self.version is None or version <= self.version:
+            return
+        if version != self.version + 1:
+            self.clear()
+        self.version = version
+    
+    def put(self, key, filters: dict, body: bytes, next_cursor: Optional[str], generation: int):
+        # A write landed while this page was being built; it may be stale
+        if generation != self.generation:
+            return
+        super().put(key, {'filters': filters, 'body': body, 'next_cursor': next_cursor})
+    
+    def invalidate(self, *docs: dict):
+        self.generation += 1
+        if len(docs) > self.precise_limit:
+            # Bulk writes: matching every entry against thousands of documents
+            # costs more than refilling the cache
+            self.clear()
+            return
+        for key, (_, entry) in list(self._entries.items()):
+            if any(property_matches(entry['filters'], doc) for doc in docs if doc):
+                del self._entries[key]
+                self.invalidations += 1
+
+listing_cache = ListingCache(LISTING_CACHE_SIZE, LISTING_CACHE_TTL)
+
+# Collection-level change marker, shared by all workers through the `meta`
+# collection and re-read at most every CHANGE_MARKER_TTL seconds. Listing
+# ETags embed the marker version, so a revalidation while the version is
+# unchanged is answered without a Mongo round trip.
+class ChangeMarker:
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._value = {'version': 0, 'updated_at': None}
+        self._expires_at = 0.0
+    
+    async def current(self) -> dict:
+        if time.monotonic() >= self._expires_at:
+            doc = await db.meta.find_one({'_id': self.name})
+            if doc:
+                self._value = {'version': doc['version'], 'updated_at': doc.get('updated_at')}
+            self._expires_at = time.monotonic() + self.ttl
+        return self._value
+    
+    async def bump(self):
+        # Call after the write lands: a page read before the bump is tagged
+        # with the old version and therefore always revalidates.
+        doc = await db.meta.find_one_and_update(
+            {'_id': self.name},
+            {'$inc': {'version': 1}, '$set': {'updated_at': utc_now()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._value = {'version': doc['version'], 'updated_at': doc['updated_at']}
+        self._expires_at = time.monotonic() + self.ttl
+        return doc['version']
+
+property_marker = ChangeMarker('properties', CHANGE_MARKER_TTL)
+user_marker = ChangeMarker('users', CHANGE_MARKER_TTL)
+
+async def properties_changed(*docs: dict):
+    # Call after a property write lands, with each written document as it
+    # was before and after
+    listing_cache.invalidate(*docs)
+    listing_cache.advance(await property_marker.bump())
+
+# Full-text search (q=). Each worker keeps an InvertedIndex over title and
+# description plus the fields the listing filters test, loaded from the
+# collection on first use. The worker's own writes are applied as they
+# happen; anyone else's show up as a new property marker version, after
+# which the properties updated since the last sync are read again.
+TEXT_INDEX_PROJECTION = {
+    '_id': 0, 'id': 1, 'title': 1, 'description': 1, 'status': 1,
+    'property_type': 1, 'price': 1, 'bedrooms': 1, 'location': 1, 'updated_at': 1,
+}
+RELEVANCE_SORT = [('score', -1), ('id', 1)]
+
+class PropertyTextIndex:
+    def __init__(self, lag: float):
+        self.index = InvertedIndex()
+        self.lag = timedelta(seconds=lag)
+        self.version = None
+        self.watermark = None
+        self.syncs = 0
+        self._lock = asyncio.Lock()
+    
+    def apply(self, doc: dict):
+        meta = {field: doc.get(field) for field in ('status', 'property_type', 'price', 'bedrooms', 'location')}
+        self.index.upsert(doc['id'], doc.get('title', ''), doc.get('description', ''), meta)
+    
+    def set_status(self, doc_id: str, status: str):
+        self.index.update_meta(doc_id, status=status)
+    
+    def remove(self, doc_id: str):
+        self.index.remove(doc_id)
+    
+    async def sync(self):
+        marker = await property_marker.current()
+        if marker['version'] == self.version:
+            return
+        async with self._lock:
+            if marker['version'] == self.version:
+                return
+            query = {} if self.watermark is None else {'updated_at': {'$gte': self.watermark - self.lag}}
+            watermark = self.watermark
+            async for doc in db.properties.find(query, TEXT_INDEX_PROJECTION):
+                self.apply(doc)
+                updated_at = doc.get('updated_at')
+                if isinstance(updated_at, datetime) and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+            self.watermark = watermark
+            self.version = marker['version']
+            self.syncs += 1
+    
+    async def search(self, terms: str, filters: dict, cursor: Optional[str] = None) -> list:
+        # (score, id) best first, restricted to the structured filters and to
+        # what comes after `cursor`
+        await self.sync()
+        ranked = self.index.search(terms, accept=lambda meta: property_matches(filters, meta))
+        if cursor:
+            score, last_id = decode_cursor(RELEVANCE_SORT, cursor)
+            if isinstance(score, bool) or not isinstance(score, (int, float)) or not isinstance(last_id, str):
+                raise HTTPException(status_code=400, detail='Invalid cursor')
+            ranked = [(s, i) for s, i in ranked if s < score or (s == score and i > last_id)]
+        return ranked
+    
+    def stats(self) -> dict:
+        return {
+            'documents': len(self.index),
+            'terms': len(self.index.postings),
+            'version': self.version,
+            'syncs': self.syncs,
+        }
+
+property_text_index = PropertyTextIndex(TEXT_INDEX_SYNC_LAG)
+
+async def fetch_ranked(ids: list, projection: dict) -> list:
+    docs = await db.properties.find({'id': {'$in': ids}}, projection).to_list(len(ids))
+    by_id = {doc['id']: doc for doc in docs}
+    for doc_id in ids:
+        if doc_id not in by_id:
+            # Removed out of band; forget it so it stops taking a result slot
+            property_text_index.remove(doc_id)
+    return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+class RankedCursor:
+    # The slice of the Motor cursor interface ndjson_response drains, over
+    # ranked ids that are fetched a batch at a time in rank order
+    def __init__(self, ids: list, projection: dict):
+        self.ids = ids
+        self.projection = projection
+    
+    def batch_size(self, size: int):
+        return self
+    
+    async def to_list(self, length: int) -> list:
+        chunk, self.ids = self.ids[:length], self.ids[length:]
+        return await fetch_ranked(chunk, self.projection) if chunk else []
+
+# user id -> (users marker version, User)
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+# sha256(token) -> verified claims; keyed by digest so raw bearer tokens are
+# not held in memory
+token_cache = TTLCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+def decode_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+    claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    ttl = min(TOKEN_CACHE_TTL, claims.get('exp', 0) - time.time())
+    if ttl > 0:
+        token_cache.put(key, claims, ttl)
+    return claims
+
+async def load_user(user_id: str) -> Optional[User]:
+    marker = await user_marker.current()
+    cached = user_cache.get(user_id)
+    if cached and cached[0] == marker['version']:
+        return cached[1]
+    user_doc = await db.users.find_one({'id': user_id}, USER_PROJECTION)
+    if not user_doc:
+        return None
+    user = User(**user_doc)
+    user_cache.put(user_id, (marker['version'], user))
+    return user
+
+# Materialized analytics counters (meta.analytics). Writes $inc them in the
+# same request; a periodic reconcile resets them to the real counts so drift
+# from crashes or out-of-band writes is bounded by the reconcile interval.
+STATUS_COUNTERS = {'approved': 'approved_properties', 'pending': 'pending_properties'}
+
+async def bump_counters(deltas: dict):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        await db.meta.update_one({'_id': 'analytics'}, {'$inc': deltas}, upsert=True)
+
+def status_deltas(old: Optional[str], new: Optional[str]) -> dict:
+    deltas = {}
+    if old != new:
+        for status, delta in ((old, -1), (new, 1)):
+            if status in STATUS_COUNTERS:
+                deltas[STATUS_COUNTERS[status]] = deltas.get(STATUS_COUNTERS[status], 0) + delta
+    return deltas
+
+async def reconcile_counters() -> dict:
+    counts = {
+        'total_properties': await db.properties.count_documents({}),
+        'approved_properties': await db.properties.count_documents({'status': 'approved'}),
+        'pending_properties': await db.properties.count_documents({'status': 'pending'}),
+        'total_users': await db.users.count_documents({}),
+        'total_leads': await db.leads.count_documents({}),
+    }
+    await db.meta.update_one({'_id': 'analytics'}, {'$set': {**counts, 'reconciled_at': utc_now()}}, upsert=True)
+    return counts
+
+async def reconcile_counters_periodically():
+    while True:
+        try:
+            await reconcile_counters()
+        except Exception:
+            logger.exception('Analytics counter reconcile failed')
+        await asyncio.sleep(ANALYTICS_RECONCILE_INTERVAL)
+
+# Time-bucketed rollups (analytics_rollups). Each event $incs one document
+# per granularity keyed by (metric, granularity, bucket, property_type,
+# status), so a range query reads a few hundred tiny documents no matter how
+# many leads or listings exist. backfill_rollups.py loads history.
+ROLLUP_METRICS = ('leads', 'listings', 'status_changes')
+ROLLUP_GRANULARITIES = ('day', 'week')
+ROLLUP_BREAKDOWNS = ('property_type', 'status')
+
+def bucket_start(when: datetime, granularity: str) -> datetime:
+    # UTC midnight, weeks starting Monday (matches $dateTrunc in the backfill)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    day = when.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        day -= timedelta(days=day.weekday())
+    return day
+
+async def record_rollup(metric: str, when: datetime, property_type: Optional[str], status: Optional[str], count: int = 1):
+    ops = [
+        UpdateOne(
+            {
+                'metric': metric,
+                'granularity': granularity,
+                'bucket': bucket_start(when, granularity),
+                'property_type': property_type,
+                'status': status,
+            },
+            {'$inc': {'count': count}},
+            upsert=True
+        )
+        for granularity in ROLLUP_GRANULARITIES
+    ]
+    await db.analytics_rollups.bulk_write(ops, ordered=False)
+
+async def ingest_leads(docs: list) -> int:
+    # Used by the write-behind buffer. A duplicate key means an earlier attempt
+    # already stored that lead, so only the new ones reach counters and rollups
+    try:
+        await db.leads.insert_many(docs, ordered=False)
+        inserted = docs
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error.get('code') != 11000 for error in errors):
+            raise
+        skipped = {error['index'] for error in errors}
+        inserted = [doc for i, doc in enumerate(docs) if i not in skipped]
+    if not inserted:
+        return 0
+    
+    property_ids = list({doc['property_id'] for doc in inserted})
+    props = {
+        prop['id']: prop
+        async for prop in db.properties.find({'id': {'$in': property_ids}}, {'_id': 0, 'id': 1, 'property_type': 1, 'status': 1})
+    }
+    events = []
+    for doc in inserted:
+        prop = props.get(doc['property_id'], {})
+        events.append((doc['created_at'], prop.get('property_type'), prop.get('status')))
+    await bump_counters({'total_leads': len(inserted)})
+    await record_rollups('leads', events)
+    return len(inserted)
+
+# Write-behind leads. Each accepted lead is appended to the active spool
+# segment before the response is sent, then kept in memory until a flush
+# seals the segment and writes it with insert_many. A segment file is
+# removed only once its leads are stored, so anything left in LEAD_SPOOL_DIR
+# after a crash or failed flush is replayed at the next startup. Segments
+# stay flock()ed while their owner holds them, which keeps workers sharing
+# the directory from replaying each other's live segments.
+class SpoolSegment:
+    def __init__(self, path: Path, file, docs: Optional[list] = None):
+        self.path = path
+        self.file = file
+        self.docs = docs or []
+    
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+        self.file.close()
+
+class LeadBuffer:
+    def __init__(self, spool_dir: Path, batch_size: int, fsync: bool):
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.accepted = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.replayed = 0
+        self._active = None
+        self._pending = []
+        self._lock = asyncio.Lock()
+    
+    def _open_segment(self) -> SpoolSegment:
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f'leads-{time.time_ns()}-{os.getpid()}.ndjson'
+        file = open(path, 'a', encoding='utf-8')
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return SpoolSegment(path, file)
+    
+    def add(self, lead: Lead):
+        if self._active is None:
+            self._active = self._open_segment()
+        segment = self._active
+        segment.file.write(lead.model_dump_json() + '\n')
+        segment.file.flush()
+        if self.fsync:
+            os.fsync(segment.file.fileno())
+        segment.docs.append(lead.model_dump())
+        self.accepted += 1
+        if len(segment.docs) == self.batch_size:
+            start_background(self.flush())
+    
+    async def flush(self):
+        async with self._lock:
+            if self._active and self._active.docs:
+                self._pending.append(self._active)
+                self._active = None
+            while self._pending:
+                segment = self._pending[0]
+                try:
+                    inserted = await ingest_leads(segment.docs)
+                except Exception:
+                    self.failures += 1
+                    logger.exception(f'Lead flush failed, {self.depth()} leads stay spooled')
+                    return
+                self._pending.pop(0)
+                segment.discard()
+                self.flushed += inserted
+                self.flushes += 1
+    
+    async def replay(self):
+        if not self.spool_dir.is_dir():
+            return
+        for path in sorted(self.spool_dir.glob('leads-*.ndjson')):
+            try:
+                file = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                # Another worker replayed and removed it after the glob
+                continue
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                continue
+            if not path.exists():
+                # ...or between our open and lock
+                file.close()
+                continue
+            docs = []
+            for line in file:
+                try:
+                    docs.append(Lead.model_validate_json(line).model_dump())
+                except ValueError:
+                    # A torn last line was never acknowledged to the client
+                    logger.warning(f'Skipping unreadable line in {path.name}')
+            self._pending.append(SpoolSegment(path, file, docs))
+            self.replayed += len(docs)
+        await self.flush()
+    
+    def depth(self) -> int:
+        active = len(self._active.docs) if self._active else 0
+        return active + sum(len(segment.docs) for segment in self._pending)
+    
+    def stats(self) -> dict:
+        return {
+            'enabled': LEAD_WRITE_BEHIND,
+            'buffered': self.depth(),
+            'pending_segments': len(self._pending),
+            'accepted': self.accepted,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'replayed': self.replayed,
+        }
+
+lead_buffer = LeadBuffer(LEAD_SPOOL_DIR, LEAD_BATCH_SIZE, LEAD_SPOOL_FSYNC)
+
+async def flush_leads_periodically():
+    while True:
+        await asyncio.sleep(LEAD_FLUSH_INTERVAL)
+        await lead_buffer.flush()
+
+async def record_rollups(metric: str, events: list):
+    # Batch form of record_rollup for (when, property_type, status) events:
+    # one upsert per distinct day bucket and breakdown instead of per event
+    groups = {}
+    for when, property_type, status in events:
+        key = (bucket_start(when, 'day'), property_type, status)
+        groups[key] = groups.get(key, 0) + 1
+    for (day, property_type, status), count in groups.items():
+        await record_rollup(metric, day, property_type, status, count)
+
+# Rate limiting. One token bucket per key, refilled continuously at `rate`
+# per minute up to `burst`. Buckets live in an LRU capped at `max_keys`; the
+# least recently used one is usually idle and therefore full, so dropping it
+# loses nothing a fresh bucket would not give back.
+class RateLimiter:
+    def __init__(self, name: str, rate: float, burst: float, max_keys: int):
+        self.name = name
+        self.rate = rate / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+        self._buckets = OrderedDict()
+    
+    def take(self, key: str) -> float:
+        # Returns 0 when the request may proceed, else seconds until it could
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return wait
+    
+    def enforce(self, key: str):
+        wait = self.take(key)
+        if wait:
+            raise HTTPException(
+                status_code=429,
+                detail='Too many requests, retry later',
+                headers={'Retry-After': str(math.ceil(wait))}
+            )
+    
+    def stats(self) -> dict:
+        return {
+            'keys': len(self._buckets),
+            'max_keys': self.max_keys,
+            'rate_per_minute': self.rate * 60,
+            'burst': self.burst,
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'evictions': self.evictions,
+        }
+
+auth_ip_limiter = RateLimiter('auth_ip', AUTH_IP_RATE, AUTH_IP_BURST, RATE_LIMIT_MAX_KEYS)
+login_account_limiter = RateLimiter('login_account', LOGIN_ACCOUNT_RATE, LOGIN_ACCOUNT_BURST, RATE_LIMIT_MAX_KEYS)
+lead_ip_limiter = RateLimiter('lead_ip', LEAD_IP_RATE, LEAD_IP_BURST, RATE_LIMIT_MAX_KEYS)
+rate_limiters = [auth_ip_limiter, login_account_limiter, lead_ip_limiter]
+
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get('x-forwarded-for', '').split(',')[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else 'unknown'
+
+# Conditional requests
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+def not_modified_since(request: Request, last_modified: Optional[datetime]) -> bool:
+    header = request.headers.get('if-modified-since')
+    if not header or not last_modified or 'if-none-match' in request.headers:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+def listing_validators(marker: dict, key) -> dict:
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+    return validator_headers(f'"{marker["version"]}-{digest}"', marker['updated_at'])
+
+def as_datetime(value):
+    # Rows not yet converted by backfill_dates still hold ISO strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def property_validators(prop: dict, names: Optional[frozenset]) -> dict:
+    updated_at = as_datetime(prop.get('updated_at'))
+    raw = f"{prop['id']}|{updated_at.isoformat() if updated_at else ''}|{','.join(sorted(names or ()))}"
+    return validator_headers(f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"', updated_at)
+
+def is_not_modified(request: Request, headers: dict, last_modified: Optional[datetime]) -> bool:
+    return etag_matches(request, headers['ETag']) or not_modified_since(request, last_modified)
+
+# Indexes ensured at startup. Every route query shape should be served by one
+# of these; GET /api/admin/index-report flags the ones that are not.
+def _sort_indexes(prefix: list) -> List[IndexModel]:
+    models = []
+    for sort_spec in PROPERTY_SORTS.values():
+        if sort_spec[0][1] == DESCENDING:
+            continue  # walked backwards by its ascending twin
+        models.append(IndexModel(prefix + [(field, ASCENDING) for field, _ in sort_spec]))
+    return models
+
+# (collection, index name) -> error from the last ensure_indexes attempt
+index_failures = {}
+
+INDEXES = {
+    'users': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('email', ASCENDING)], unique=True),
+        IndexModel([('role', ASCENDING), ('created_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('created_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('search_terms', ASCENDING), ('role', ASCENDING)]),
+    ],
+    'properties': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('seller_id', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('property_type', ASCENDING), ('created_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('bedrooms', ASCENDING), ('price', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('location_tokens', ASCENDING)]),
+        IndexModel([('geo', GEOSPHERE), ('status', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)]),
+        *_sort_indexes([]),
+        *_sort_indexes([('status', ASCENDING)]),
+    ],
+    'analytics_rollups': [
+        IndexModel([('metric', ASCENDING), ('granularity', ASCENDING), ('bucket', ASCENDING), ('property_type', ASCENDING), ('status', ASCENDING)], unique=True),
+    ],
+    'leads': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('property_id', ASCENDING), ('created_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('created_at', ASCENDING), ('id', ASCENDING)]),
+    ],
+}
+
+# Representative query shapes issued by the routes, checked with explain()
+def _audited_queries() -> list:
+    queries = [
+        ('get_current_user', 'users', {'id': ''}, None),
+        ('register/login', 'users', {'email': ''}, None),
+        ('get_property', 'properties', {'id': ''}, None),
+        ('update_property_status', 'properties', {'id': ''}, None),
+        ('get_seller_properties', 'properties', {'seller_id': ''}, None),
+    ]
+    for name, sort_spec in PROPERTY_SORTS.items():
+        queries.append((f'get_properties sort={name}', 'properties', {}, sort_spec))
+        queries.append((f'get_properties status sort={name}', 'properties', {'status': 'approved'}, sort_spec))
+    default_sort = PROPERTY_SORTS['newest']
+    queries += [
+        ('get_properties property_type', 'properties', build_property_query(property_type='villa'), default_sort),
+        ('get_properties bedrooms', 'properties', build_property_query(bedrooms=3), PROPERTY_SORTS['price_asc']),
+        ('get_properties price range', 'properties', build_property_query(min_price=1, max_price=2), PROPERTY_SORTS['price_asc']),
+        ('get_properties location', 'properties', build_property_query(location='x'), default_sort),
+    ]
+    since = utc_now()
+    point = {'type': 'Point', 'coordinates': [-118.4, 34.07]}
+    queries += [
+        ('PropertyTextIndex.sync', 'properties', {'updated_at': {'$gte': since}}, None),
+        ('get_properties_near', 'properties', {'geo': {'$nearSphere': {'$geometry': point}}, 'status': 'approved'}, None),
+        ('claim_moderation_items', 'properties', claimable_query('x', since), PROPERTY_SORTS['oldest']),
+        ('get_leads', 'leads', {}, CREATED_SORTS['newest']),
+        ('get_leads property_id', 'leads', build_lead_query(property_id='x'), CREATED_SORTS['newest']),
+        ('get_leads created range', 'leads', build_lead_query(created_after=since, created_before=since), CREATED_SORTS['oldest']),
+        ('get_users', 'users', {}, CREATED_SORTS['newest']),
+        ('get_users role', 'users', {'role': 'client'}, CREATED_SORTS['newest']),
+        ('get_users q', 'users', user_search_query('jane'), CREATED_SORTS['newest']),
+        ('get_users role count', 'users', {'role': 'client'}, None),
+        ('get_users q role count', 'users', {**user_search_query('jane'), 'role': 'client'}, None),
+        ('get_leads property_id created range', 'leads', build_lead_query('x', since, since), CREATED_SORTS['newest']),
+    ]
+    return queries
+
+def _plan_stages(plan: dict, stages: list, indexes: list):
+    if 'stage' in plan:
+        stages.append(plan['stage'])
+    if 'indexName' in plan:
+        indexes.append(plan['indexName'])
+    for key in ('inputStage', 'queryPlan'):
+        if isinstance(plan.get(key), dict):
+            _plan_stages(plan[key], stages, indexes)
+    for child in plan.get('inputStages', []):
+        _plan_stages(child, stages, indexes)
+
+# Geo search. Distances are great-circle; bounding boxes are polygons whose
+# edges 2dsphere treats as geodesics, which is indistinguishable from lines of
+# latitude at city scale.
+DISTANCE_UNITS = {'km': 1000.0, 'mi': 1609.344}
+
+def parse_bbox(bbox: str) -> list:
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail='bbox must be min_lng,min_lat,max_lng,max_lat')
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90 and max_lng - min_lng < 180):
+        raise HTTPException(status_code=400, detail='Invalid bbox')
+    return [min_lng, min_lat, max_lng, max_lat]
+
+def bbox_polygon(box: list) -> dict:
+    min_lng, min_lat, max_lng, max_lat = box
+    ring = [[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]
+    return {'type': 'Polygon', 'coordinates': [ring]}
+
 # Auth routes
 @api_router.post('/auth/register', response_model=TokenResponse)
-async def register(user_input: UserCreate):
+async def register(user_input: UserCreate, request: Request):
+    auth_ip_limiter.enforce(client_ip(request))
+    
     existing = await db.users.find_one({'email': user_input.email}, {'_id': 0})
     if existing:
         raise HTTPException(status_code=400, detail='Email already registered')
@@ -156,21 +1513,37 @@ async def register(user_input: UserCreate):
         role=user_input.role
     )
     user_dict = user.model_dump()
-    user_dict['password'] = hash_password(user_input.password)
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
+    user_dict['password'] = await password_hasher.hash(user_input.password)
+    user_dict.update(user_search_fields(user.name, user.email))
     
-    await db.users.insert_one(user_dict)
+    try:
+        await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail='Email already registered')
+    await bump_counters({'total_users': 1})
     token = create_token(user.id)
     return TokenResponse(token=token, user=user)
 
 @api_router.post('/auth/login', response_model=TokenResponse)
-async def login(login_input: UserLogin):
+async def login(login_input: UserLogin, request: Request):
+    auth_ip_limiter.enforce(client_ip(request))
+    login_account_limiter.enforce(login_input.email.lower())
+    
     user_doc = await db.users.find_one({'email': login_input.email}, {'_id': 0})
-    if not user_doc or not verify_password(login_input.password, user_doc['password']):
+    if not user_doc or not await password_hasher.verify(login_input.password, user_doc['password']):
         raise HTTPException(status_code=401, detail='Invalid credentials')
     
-    if isinstance(user_doc['created_at'], str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
+    if password_hasher.needs_rehash(user_doc['password']):
+        # Move the stored hash to the current cost while we hold the plaintext;
+        # the filter on the old hash keeps a concurrent password change intact
+        try:
+            rehashed = await password_hasher.hash(login_input.password)
+            await db.users.update_one(
+                {'id': user_doc['id'], 'password': user_doc['password']},
+                {'$set': {'password': rehashed}}
+            )
+        except HTTPException:
+            pass
     
     user = User(**user_doc)
     token = create_token(user.id)
@@ -181,21 +1554,200 @@ async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 # Property routes
+def new_property(data: PropertyCreate, seller_id: str):
+    # The model plus the internal search and geo fields stored alongside it
+    prop = Property(**data.model_dump(), seller_id=seller_id)
+    if prop.latitude is None or prop.longitude is None:
+        prop.latitude, prop.longitude = geocode(prop.location) or (None, None)
+    doc = prop.model_dump()
+    doc.update(location_fields(prop.location))
+    doc.update(geo_fields(prop.latitude, prop.longitude))
+    return prop, doc
+
 @api_router.post('/properties', response_model=Property)
 async def create_property(property_input: PropertyCreate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ['seller', 'admin']:
         raise HTTPException(status_code=403, detail='Only sellers can create properties')
     
-    prop = Property(**property_input.model_dump(), seller_id=current_user.id)
-    prop_dict = prop.model_dump()
-    prop_dict['created_at'] = prop_dict['created_at'].isoformat()
-    prop_dict['updated_at'] = prop_dict['updated_at'].isoformat()
-    
+    prop, prop_dict = new_property(property_input, current_user.id)
     await db.properties.insert_one(prop_dict)
+    property_text_index.apply(prop_dict)
+    await asyncio.gather(
+        properties_changed(prop_dict),
+        bump_counters({'total_properties': 1, **status_deltas(None, prop.status)}),
+        record_rollup('listings', prop.created_at, prop.property_type, prop.status)
+    )
     return prop
 
+# Bulk import. The body is a JSON array or, with Content-Type
+# application/x-ndjson, one PropertyCreate per line. Valid items are written
+# in unordered insert_many batches and every item gets a report entry keyed
+# by its position; with Accept: application/x-ndjson the report streams back
+# batch by batch while the import runs.
+def bulk_items(body: bytes, ndjson: bool) -> list:
+    if ndjson:
+        return [line for line in body.splitlines() if line.strip()]
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Body must be a JSON array or NDJSON')
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail='Body must be a JSON array or NDJSON')
+    return items
+
+def validation_errors(e: ValidationError) -> list:
+    return [{'loc': list(error['loc']), 'msg': error['msg']} for error in e.errors(include_url=False)]
+
+async def import_properties(items: list, seller_id: str):
+    for start in range(0, len(items), BULK_IMPORT_BATCH_SIZE):
+        report, docs, positions = [], [], []
+        for index, item in enumerate(items[start:start + BULK_IMPORT_BATCH_SIZE], start):
+            try:
+                if isinstance(item, bytes):
+                    data = PropertyCreate.model_validate_json(item)
+                else:
+                    data = PropertyCreate.model_validate(item)
+            except ValidationError as e:
+                report.append({'index': index, 'status': 'error', 'errors': validation_errors(e)})
+                continue
+            prop, doc = new_property(data, seller_id)
+            positions.append(len(report))
+            report.append({'index': index, 'status': 'created', 'id': prop.id})
+            docs.append(doc)
+        
+        failed = {}
+        if docs:
+            try:
+                await db.properties.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                failed = {error['index']: error.get('errmsg', 'Write failed') for error in e.details.get('writeErrors', [])}
+            for i, errmsg in failed.items():
+                report[positions[i]] = {'index': report[positions[i]]['index'], 'status': 'error', 'errors': [{'loc': [], 'msg': errmsg}]}
+        
+        inserted = [doc for i, doc in enumerate(docs) if i not in failed]
+        if inserted:
+            for doc in inserted:
+                property_text_index.apply(doc)
+            await properties_changed(*inserted)
+            deltas = {'total_properties': len(inserted)}
+            for doc in inserted:
+                for field, delta in status_deltas(None, doc['status']).items():
+                    deltas[field] = deltas.get(field, 0) + delta
+            await bump_counters(deltas)
+            await record_rollups('listings', [(doc['created_at'], doc['property_type'], doc['status']) for doc in inserted])
+        yield report
+
+async def _bulk_report_lines(reports):
+    created = failed = 0
+    async for report in reports:
+        for entry in report:
+            if entry['status'] == 'created':
+                created += 1
+            else:
+                failed += 1
+        yield b''.join(json.dumps(entry).encode('utf-8') + b'\n' for entry in report)
+    yield json.dumps({'created': created, 'failed': failed}).encode('utf-8') + b'\n'
+
+@api_router.post('/properties/bulk')
+async def bulk_create_properties(request: Request, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['seller', 'admin']:
+        raise HTTPException(status_code=403, detail='Only sellers can create properties')
+    
+    items = bulk_items(await request.body(), NDJSON in request.headers.get('content-type', ''))
+    if len(items) > BULK_IMPORT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f'At most {BULK_IMPORT_MAX_ITEMS} items per import')
+    
+    reports = import_properties(items, current_user.id)
+    if wants_ndjson(request):
+        return StreamingResponse(_bulk_report_lines(reports), media_type=NDJSON)
+    
+    items_report = [entry async for report in reports for entry in report]
+    created = sum(1 for entry in items_report if entry['status'] == 'created')
+    return {'created': created, 'failed': len(items_report) - created, 'items': items_report}
+
 @api_router.get('/properties', response_model=List[Property])
 async def get_properties(
+    request: Request,
+    status: Optional[str] = None,
+    property_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    bedrooms: Optional[int] = None,
+    location: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None
+):
+    terms = normalize_text(q) if q else ''
+    if terms:
+        # Search results are ranked; their cursors carry (score, id)
+        if sort not in (None, 'relevance'):
+            raise HTTPException(status_code=400, detail='Search results are sorted by relevance')
+        sort = 'relevance'
+    else:
+        sort = sort or 'newest'
+        if sort not in PROPERTY_SORTS:
+            raise HTTPException(status_code=400, detail=f'Unknown sort: {sort}')
+    names = parse_fields(fields)
+    sort_spec = RELEVANCE_SORT if terms else PROPERTY_SORTS[sort]
+    sort_keys = [] if terms else [field for field, _ in sort_spec]
+    projection = sparse_projection(names, sort_keys) if names else PROPERTY_PROJECTION
+    filters = {
+        'status': status or None,
+        'property_type': property_type or None,
+        'min_price': min_price,
+        'max_price': max_price,
+        'bedrooms': bedrooms,
+        'location': normalize_text(location) or None,
+    }
+    if wants_ndjson(request):
+        # Unbounded unless a limit is given; never cached
+        if terms:
+            ranked = await property_text_index.search(terms, filters, cursor)
+            found = RankedCursor([doc_id for _, doc_id in ranked[:limit or None]], projection)
+        else:
+            found = keyset_find(db.properties, build_property_query(**filters), sort_spec, cursor, projection).limit(limit or 0)
+        if names:
+            return ndjson_response(found, PropertySparseRows, shape=lambda doc: shape_sparse(doc, names), headers=VARY_ACCEPT)
+        return ndjson_response(found, PropertyRows, headers=VARY_ACCEPT)
+    
+    limit = limit or DEFAULT_PAGE_SIZE
+    key = (tuple(sorted(filters.items())), terms, sort, cursor, limit, names)
+    marker = await property_marker.current()
+    validators = {**listing_validators(marker, key), **VARY_ACCEPT}
+    if is_not_modified(request, validators, marker['updated_at']):
+        return Response(status_code=304, headers=validators)
+    
+    listing_cache.sync(marker['version'])
+    cached = listing_cache.get(key)
+    if cached:
+        headers = {**validators, 'X-Next-Cursor': cached['next_cursor']} if cached['next_cursor'] else validators
+        return json_response(cached['body'], {**headers, 'X-Cache': 'HIT'})
+    
+    generation = listing_cache.generation
+    if terms:
+        ranked = await property_text_index.search(terms, filters, cursor)
+        page = ranked[:limit]
+        properties = await fetch_ranked([doc_id for _, doc_id in page], projection)
+        next_cursor = encode_cursor(RELEVANCE_SORT, {'score': page[-1][0], 'id': page[-1][1]}) if len(ranked) > limit else None
+    else:
+        query = build_property_query(**filters)
+        properties, next_cursor = await paginate(db.properties, query, sort_spec, cursor, limit, projection)
+    
+    if names:
+        sparse = [shape_sparse(prop, names) for prop in properties]
+        body = PropertySparseRows.dump_json(sparse)
+    else:
+        body = PropertyRows.dump_json(properties)
+    headers = {**validators, 'X-Next-Cursor': next_cursor} if next_cursor else validators
+    listing_cache.put(key, filters, body, next_cursor, generation)
+    return json_response(body, {**headers, 'X-Cache': 'MISS'})
+
+@api_router.get('/properties/facets', response_model=PropertyFacets)
+async def get_property_facets(
+    request: Request,
     status: Optional[str] = None,
     property_type: Optional[str] = None,
     min_price: Optional[float] = None,
@@ -203,110 +1755,433 @@ async def get_properties(
     bedrooms: Optional[int] = None,
     location: Optional[str] = None
 ):
-    query = {}
-    if status:
-        query['status'] = status
-    if property_type:
-        query['property_type'] = property_type
-    if min_price is not None:
-        query['price'] = query.get('price', {})
-        query['price']['$gte'] = min_price
-    if max_price is not None:
-        query['price'] = query.get('price', {})
-        query['price']['$lte'] = max_price
-    if bedrooms is not None:
-        query['bedrooms'] = bedrooms
-    if location:
-        query['location'] = {'$regex': location, '$options': 'i'}
+    filters = {
+        'status': status or None,
+        'property_type': property_type or None,
+        'min_price': min_price,
+        'max_price': max_price,
+        'bedrooms': bedrooms,
+        'location': normalize_text(location) or None,
+    }
+    key = ('facets', tuple(sorted(filters.items())))
+    marker = await property_marker.current()
+    validators = listing_validators(marker, key)
+    if is_not_modified(request, validators, marker['updated_at']):
+        return Response(status_code=304, headers=validators)
     
-    properties = await db.properties.find(query, {'_id': 0}).to_list(1000)
-    for prop in properties:
-        if isinstance(prop['created_at'], str):
-            prop['created_at'] = datetime.fromisoformat(prop['created_at'])
-        if isinstance(prop['updated_at'], str):
-            prop['updated_at'] = datetime.fromisoformat(prop['updated_at'])
+    listing_cache.sync(marker['version'])
+    cached = listing_cache.get(key)
+    if cached:
+        return json_response(cached['body'], {**validators, 'X-Cache': 'HIT'})
     
-    return properties
+    generation = listing_cache.generation
+    result = await db.properties.aggregate(facet_pipeline(filters)).to_list(1)
+    body = facets_from_result(result[0]).model_dump_json().encode('utf-8')
+    # Disjunctive counts move whenever a document matching the shared filters changes
+    listing_cache.put(key, {'location': filters['location']}, body, None, generation)
+    return json_response(body, {**validators, 'X-Cache': 'MISS'})
+
+@api_router.get('/properties/near', response_model=List[PropertyNear])
+async def get_properties_near(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    near: Optional[str] = None,
+    radius: Optional[float] = Query(None, gt=0),
+    unit: str = 'km',
+    bbox: Optional[str] = None,
+    status: Optional[str] = None,
+    property_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    bedrooms: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)
+):
+    if unit not in DISTANCE_UNITS:
+        raise HTTPException(status_code=400, detail=f'Unknown unit: {unit}')
+    box = parse_bbox(bbox) if bbox else None
+    # Distances are measured from lat/lng, a gazetteer place, or the box centre
+    if lat is not None and lng is not None:
+        center = (lat, lng)
+    elif near:
+        center = geocode(near)
+        if not center:
+            raise HTTPException(status_code=404, detail=f'Unknown place: {near}')
+    elif box:
+        center = ((box[1] + box[3]) / 2, (box[0] + box[2]) / 2)
+    else:
+        raise HTTPException(status_code=400, detail='Provide lat and lng, near, or bbox')
+    
+    query = build_property_query(status, property_type, min_price, max_price, bedrooms)
+    if box:
+        query['geo'] = {'$geoWithin': {'$geometry': bbox_polygon(box)}}
+    geo_near = {
+        'near': {'type': 'Point', 'coordinates': [center[1], center[0]]},
+        'distanceField': 'distance',
+        'distanceMultiplier': 1 / DISTANCE_UNITS[unit],
+        'spherical': True,
+        'key': 'geo',
+        'query': query,
+    }
+    if radius is not None:
+        geo_near['maxDistance'] = radius * DISTANCE_UNITS[unit]
+    pipeline = [{'$geoNear': geo_near}, {'$limit': limit}, {'$project': PROPERTY_PROJECTION}]
+    properties = await db.properties.aggregate(pipeline).to_list(limit)
+    return json_response(PropertyNearRows.dump_json(properties))
 
 @api_router.get('/properties/seller', response_model=List[Property])
 async def get_seller_properties(current_user: User = Depends(get_current_user)):
-    properties = await db.properties.find({'seller_id': current_user.id}, {'_id': 0}).to_list(1000)
-    for prop in properties:
-        if isinstance(prop['created_at'], str):
-            prop['created_at'] = datetime.fromisoformat(prop['created_at'])
-        if isinstance(prop['updated_at'], str):
-            prop['updated_at'] = datetime.fromisoformat(prop['updated_at'])
-    return properties
+    properties = await db.properties.find({'seller_id': current_user.id}, PROPERTY_PROJECTION).to_list(1000)
+    return json_response(PropertyRows.dump_json(properties))
 
 @api_router.get('/properties/{property_id}', response_model=Property)
-async def get_property(property_id: str):
-    prop = await db.properties.find_one({'id': property_id}, {'_id': 0})
+async def get_property(request: Request, property_id: str, fields: Optional[str] = None):
+    names = parse_fields(fields)
+    projection = sparse_projection(names, ('updated_at',)) if names else PROPERTY_PROJECTION
+    prop = await db.properties.find_one({'id': property_id}, projection)
     if not prop:
         raise HTTPException(status_code=404, detail='Property not found')
     
-    if isinstance(prop['created_at'], str):
-        prop['created_at'] = datetime.fromisoformat(prop['created_at'])
-    if isinstance(prop['updated_at'], str):
-        prop['updated_at'] = datetime.fromisoformat(prop['updated_at'])
+    validators = property_validators(prop, names)
+    if is_not_modified(request, validators, as_datetime(prop.get('updated_at'))):
+        return Response(status_code=304, headers=validators)
     
-    return Property(**prop)
+    if names:
+        body = PropertySparseRows.dump_row(shape_sparse(prop, names))
+    else:
+        body = PropertyRows.dump_row(prop)
+    return json_response(body, validators)
 
 @api_router.patch('/properties/{property_id}', response_model=Property)
 async def update_property_status(property_id: str, update: PropertyUpdate, current_user: User = Depends(get_current_user)):
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail='Only admins can update property status')
     
-    result = await db.properties.find_one_and_update(
+    changes = {'status': update.status, 'updated_at': utc_now()}
+    before = await db.properties.find_one_and_update(
         {'id': property_id},
-        {'$set': {'status': update.status, 'updated_at': datetime.now(timezone.utc).isoformat()}},
-        return_document=True,
-        projection={'_id': 0}
+        {'$set': changes, '$unset': LEASE_FIELDS},
+        return_document=ReturnDocument.BEFORE,
+        projection=PROPERTY_PROJECTION
     )
     
-    if not result:
+    if not before:
         raise HTTPException(status_code=404, detail='Property not found')
     
-    if isinstance(result['created_at'], str):
-        result['created_at'] = datetime.fromisoformat(result['created_at'])
-    if isinstance(result['updated_at'], str):
-        result['updated_at'] = datetime.fromisoformat(result['updated_at'])
+    result = {**before, **changes}
+    property_text_index.apply(result)
+    follow_ups = [properties_changed(before, result), bump_counters(status_deltas(before.get('status'), update.status))]
+    if before.get('status') != update.status:
+        follow_ups.append(record_rollup('status_changes', changes['updated_at'], before.get('property_type'), update.status))
+    await asyncio.gather(*follow_ups)
     
     return Property(**result)
 
+# Moderation queue. Pending properties come out oldest first from the
+# (status, created_at, id) index. A claim leases items to one admin by setting
+# lease_owner/lease_until with a conditional update_many, so concurrent
+# claims never hand out the same item; a lease lapses on its own and is
+# dropped when the item is moderated.
+LEASE_FIELDS = {'lease_owner': '', 'lease_until': ''}
+
+def claimable_query(user_id: str, now: datetime) -> dict:
+    return {
+        'status': 'pending',
+        '$or': [{'lease_until': None}, {'lease_until': {'$lte': now}}, {'lease_owner': user_id}],
+    }
+
+@api_router.get('/moderation/queue', response_model=List[Property])
+async def get_moderation_queue(
+    unclaimed: bool = False,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can moderate properties')
+    
+    # unclaimed=true hides items other moderators currently hold
+    query = claimable_query(current_user.id, utc_now()) if unclaimed else {'status': 'pending'}
+    properties, next_cursor = await paginate(db.properties, query, PROPERTY_SORTS['oldest'], cursor, limit or DEFAULT_PAGE_SIZE, PROPERTY_PROJECTION)
+    return json_response(PropertyRows.dump_json(properties), {'X-Next-Cursor': next_cursor} if next_cursor else None)
+
+@api_router.post('/moderation/claim', response_model=List[Property])
+async def claim_moderation_items(
+    limit: int = Query(20, ge=1, le=MODERATION_CLAIM_MAX),
+    lease: float = Query(MODERATION_LEASE_SECONDS, gt=0, le=3600),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can moderate properties')
+    
+    # Items this admin already holds come first and get their lease renewed;
+    # the rest are filled oldest first, retrying when another moderator wins
+    # some of the candidates
+    now = utc_now()
+    lease_until = now + timedelta(seconds=lease)
+    sort_spec = PROPERTY_SORTS['oldest']
+    held = {'status': 'pending', 'lease_owner': current_user.id}
+    passes = [(held, True)] + [(claimable_query(current_user.id, now), False)] * 3
+    claimed = []
+    for base, holding in passes:
+        wanted = limit - len(claimed)
+        if wanted <= 0:
+            break
+        query = {**base, 'id': {'$nin': [prop['id'] for prop in claimed]}}
+        candidates = await db.properties.find(query, {'_id': 0, 'id': 1}).sort(sort_spec).limit(wanted).to_list(wanted)
+        if not candidates:
+            if holding:
+                continue
+            break
+        ids = [doc['id'] for doc in candidates]
+        await db.properties.update_many(
+            {**claimable_query(current_user.id, now), 'id': {'$in': ids}},
+            {'$set': {'lease_owner': current_user.id, 'lease_until': lease_until}}
+        )
+        # Whatever another moderator claimed in between is simply not ours
+        won = await db.properties.find(
+            {'id': {'$in': ids}, 'lease_owner': current_user.id, 'lease_until': lease_until},
+            PROPERTY_PROJECTION
+        ).sort(sort_spec).to_list(wanted)
+        claimed += won
+        if not holding and len(won) == len(ids):
+            break
+    return json_response(PropertyRows.dump_json(claimed), {'X-Lease-Expires': lease_until.isoformat()})
+
+@api_router.post('/moderation/release')
+async def release_moderation_items(release: ModerationRelease, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can moderate properties')
+    
+    query = {'lease_owner': current_user.id}
+    if release.ids is not None:
+        query['id'] = {'$in': release.ids}
+    result = await db.properties.update_many(query, {'$unset': LEASE_FIELDS})
+    return {'released': result.modified_count}
+
+# Fields needed to update counters, rollups and listing cache entries
+MODERATION_PROJECTION = {'_id': 0, 'id': 1, 'status': 1, 'property_type': 1, 'price': 1, 'bedrooms': 1, 'location': 1}
+
+async def apply_status_change(batch: list, changes: dict) -> list:
+    # One update_many per current status, filtered on it, so a property whose
+    # status changed since it was read is never counted under the old one
+    by_status = {}
+    for doc in batch:
+        by_status.setdefault(doc.get('status'), []).append(doc)
+    changed = []
+    for old_status, docs in by_status.items():
+        ids = [doc['id'] for doc in docs]
+        result = await db.properties.update_many({'id': {'$in': ids}, 'status': old_status}, {'$set': changes, '$unset': LEASE_FIELDS})
+        if result.modified_count < len(ids):
+            updated = {
+                doc['id']
+                async for doc in db.properties.find({'id': {'$in': ids}, **changes}, {'_id': 0, 'id': 1})
+            }
+            docs = [doc for doc in docs if doc['id'] in updated]
+        changed += docs
+    
+    if changed:
+        for doc in changed:
+            property_text_index.set_status(doc['id'], changes['status'])
+        await properties_changed(*changed, *({**doc, **changes} for doc in changed))
+        deltas = {}
+        for doc in changed:
+            for field, delta in status_deltas(doc.get('status'), changes['status']).items():
+                deltas[field] = deltas.get(field, 0) + delta
+        await bump_counters(deltas)
+        await record_rollups('status_changes', [(changes['updated_at'], doc.get('property_type'), changes['status']) for doc in changed])
+    return changed
+
+@api_router.patch('/properties', response_model=BulkStatusResult)
+async def bulk_update_property_status(update: BulkStatusUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can update property status')
+    if (update.ids is None) == (update.filter is None):
+        raise HTTPException(status_code=400, detail='Provide either ids or filter')
+    
+    if update.ids is not None:
+        query = {'id': {'$in': update.ids}}
+    else:
+        filters = update.filter.model_dump()
+        filters['location'] = normalize_text(filters['location']) or None
+        query = build_property_query(**filters)
+        if not query:
+            raise HTTPException(status_code=400, detail='Filter must not be empty')
+    
+    # Properties already in the target status are left untouched
+    found = db.properties.find({'$and': [query, {'status': {'$ne': update.status}}]}, MODERATION_PROJECTION)
+    found = found.batch_size(BULK_STATUS_BATCH_SIZE)
+    changes = {'status': update.status, 'updated_at': utc_now()}
+    changed_ids = []
+    while True:
+        batch = await found.to_list(BULK_STATUS_BATCH_SIZE)
+        if not batch:
+            break
+        changed_ids += [doc['id'] for doc in await apply_status_change(batch, changes)]
+    return BulkStatusResult(status=update.status, changed=len(changed_ids), ids=changed_ids)
+
 # Lead routes
 @api_router.post('/leads', response_model=Lead)
-async def create_lead(lead_input: LeadCreate):
+async def create_lead(lead_input: LeadCreate, request: Request):
+    lead_ip_limiter.enforce(client_ip(request))
+    
     lead = Lead(**lead_input.model_dump())
+    if LEAD_WRITE_BEHIND:
+        lead_buffer.add(lead)
+        return lead
+    
     lead_dict = lead.model_dump()
-    lead_dict['created_at'] = lead_dict['created_at'].isoformat()
     
-    await db.leads.insert_one(lead_dict)
+    # Two round trips: the insert alongside the property lookup for the
+    # rollup dimensions, then the counter and rollup writes together
+    _, prop = await asyncio.gather(
+        db.leads.insert_one(lead_dict),
+        db.properties.find_one({'id': lead.property_id}, {'_id': 0, 'property_type': 1, 'status': 1})
+    )
+    prop = prop or {}
+    await asyncio.gather(
+        bump_counters({'total_leads': 1}),
+        record_rollup('leads', lead.created_at, prop.get('property_type'), prop.get('status'))
+    )
     return lead
 
 @api_router.get('/leads', response_model=List[Lead])
-async def get_leads(current_user: User = Depends(get_current_user)):
+async def get_leads(
+    request: Request,
+    property_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: str = 'newest',
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail='Only admins can view leads')
+    if sort not in CREATED_SORTS:
+        raise HTTPException(status_code=400, detail=f'Unknown sort: {sort}')
     
-    leads = await db.leads.find({}, {'_id': 0}).to_list(1000)
-    for lead in leads:
-        if isinstance(lead['created_at'], str):
-            lead['created_at'] = datetime.fromisoformat(lead['created_at'])
+    query = build_lead_query(property_id, created_after, created_before)
+    if wants_ndjson(request):
+        found = keyset_find(db.leads, query, CREATED_SORTS[sort], cursor, {'_id': 0})
+        return ndjson_response(found.limit(limit or 0), LeadRows, headers=VARY_ACCEPT)
     
-    return leads
+    leads, next_cursor = await paginate(db.leads, query, CREATED_SORTS[sort], cursor, limit or DEFAULT_PAGE_SIZE, {'_id': 0})
+    return json_response(LeadRows.dump_json(leads), {**VARY_ACCEPT, 'X-Next-Cursor': next_cursor} if next_cursor else VARY_ACCEPT)
+
+@api_router.get('/leads/export')
+async def export_leads(
+    format: str = 'csv',
+    property_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: str = 'oldest',
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can export leads')
+    if sort not in CREATED_SORTS:
+        raise HTTPException(status_code=400, detail=f'Unknown sort: {sort}')
+    if format not in ('csv', 'ndjson'):
+        raise HTTPException(status_code=400, detail=f'Unknown format: {format}')
+    
+    # One index-ordered cursor drained batch by batch; memory stays at one batch
+    found = db.leads.find(build_lead_query(property_id, created_after, created_before), {'_id': 0}).sort(CREATED_SORTS[sort])
+    filename = f"leads-{utc_now().strftime('%Y%m%d-%H%M%S')}.{format}"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if format == 'ndjson':
+        return ndjson_response(found, LeadRows, headers=headers)
+    return StreamingResponse(_csv_lines(found.batch_size(STREAM_BATCH_SIZE), LEAD_CSV_COLUMNS), media_type='text/csv', headers=headers)
 
 # User management
 @api_router.get('/users', response_model=List[User])
-async def get_users(current_user: User = Depends(get_current_user)):
+async def get_users(
+    request: Request,
+    role: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: str = 'newest',
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail='Only admins can view users')
+    if sort not in CREATED_SORTS:
+        raise HTTPException(status_code=400, detail=f'Unknown sort: {sort}')
     
-    users = await db.users.find({}, {'_id': 0, 'password': 0}).to_list(1000)
-    for user in users:
-        if isinstance(user['created_at'], str):
-            user['created_at'] = datetime.fromisoformat(user['created_at'])
+    search = user_search_query(q) if q else {}
+    query = {**search, 'role': role} if role else search
+    if wants_ndjson(request):
+        found = keyset_find(db.users, query, CREATED_SORTS[sort], cursor, USER_PROJECTION)
+        return ndjson_response(found.limit(limit or 0), UserRows, headers=VARY_ACCEPT)
     
-    return users
+    # Role counts ignore the role filter (they label the role tabs) and are
+    # index-only counts run alongside the page query
+    (users, next_cursor), *counts = await asyncio.gather(
+        paginate(db.users, query, CREATED_SORTS[sort], cursor, limit or DEFAULT_PAGE_SIZE, USER_PROJECTION),
+        *(db.users.count_documents({**search, 'role': name}) for name in USER_ROLES)
+    )
+    headers = {**VARY_ACCEPT, 'X-Role-Counts': json.dumps(dict(zip(USER_ROLES, counts)), separators=(',', ':'))}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return json_response(UserRows.dump_json(users), headers)
+
+# Metrics
+@api_router.get('/admin/metrics')
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can view metrics')
+    
+    return {
+        'listing_cache': listing_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'token_cache': token_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'text_index': property_text_index.stats(),
+        'lead_buffer': lead_buffer.stats(),
+        'rate_limits': {limiter.name: limiter.stats() for limiter in rate_limiters},
+    }
+
+# Index audit
+@api_router.get('/admin/index-report', response_model=IndexReport)
+async def get_index_report(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can view the index report')
+    
+    indexes = {}
+    for collection in INDEXES:
+        info = await db[collection].index_information()
+        indexes[collection] = sorted(info)
+    
+    entries = []
+    for route, collection, query, sort_spec in _audited_queries():
+        cursor = db[collection].find(query)
+        if sort_spec:
+            cursor = cursor.sort(sort_spec)
+        explain = await cursor.explain()
+        stages, used = [], []
+        _plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {}), stages, used)
+        entries.append(IndexAuditEntry(
+            route=route,
+            collection=collection,
+            filter=query,
+            sort=[list(key) for key in sort_spec] if sort_spec else None,
+            covered='COLLSCAN' not in stages,
+            blocking_sort='SORT' in stages,
+            indexes_used=used,
+            stages=stages
+        ))
+    
+    failed = [
+        IndexFailure(collection=collection, index=name, error=error)
+        for (collection, name), error in index_failures.items()
+        if name not in indexes.get(collection, [])
+    ]
+    return IndexReport(
+        indexes=indexes,
+        queries=entries,
+        uncovered=sum(1 for entry in entries if not entry.covered),
+        failed=failed
+    )
 
 # Analytics
 @api_router.get('/analytics', response_model=Analytics)
@@ -314,56 +2189,65 @@ async def get_analytics(current_user: User = Depends(get_current_user)):
     if current_user.role != 'admin':
         raise HTTPException(status_code=403, detail='Only admins can view analytics')
     
-    total_properties = await db.properties.count_documents({})
-    approved_properties = await db.properties.count_documents({'status': 'approved'})
-    pending_properties = await db.properties.count_documents({'status': 'pending'})
-    total_users = await db.users.count_documents({})
-    total_leads = await db.leads.count_documents({})
-    
-    return Analytics(
-        total_properties=total_properties,
-        approved_properties=approved_properties,
-        pending_properties=pending_properties,
-        total_users=total_users,
-        total_leads=total_leads
-    )
-
-app.include_router(api_router)
+    counters = await db.meta.find_one({'_id': 'analytics'})
+    if not counters or any(field not in counters for field in Analytics.model_fields):
+        # A counter $inc can upsert a partial document before the first reconcile
+        counters = await reconcile_counters()
+    
+    return Analytics(**counters)
 
-# Explicit app-level alias to ensure /api/properties is reachable
-@app.get("/api/properties", response_model=List[Property])
-async def get_properties_alias(
-    status: Optional[str] = None,
+@api_router.get('/analytics/timeseries', response_model=RollupSeries)
+async def get_analytics_timeseries(
+    metric: str = 'leads',
+    granularity: str = 'day',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     property_type: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    bedrooms: Optional[int] = None,
-    location: Optional[str] = None
+    status: Optional[str] = None,
+    breakdown: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
 ):
-    query = {}
-    if status:
-        query['status'] = status
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail='Only admins can view analytics')
+    if metric not in ROLLUP_METRICS:
+        raise HTTPException(status_code=400, detail=f'Unknown metric: {metric}')
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f'Unknown granularity: {granularity}')
+    dimensions = [name.strip() for name in (breakdown or '').split(',') if name.strip()]
+    if any(name not in ROLLUP_BREAKDOWNS for name in dimensions):
+        raise HTTPException(status_code=400, detail=f"breakdown must be a subset of {', '.join(ROLLUP_BREAKDOWNS)}")
+    
+    end = end or utc_now()
+    start = start or end - timedelta(days=30)
+    query = {
+        'metric': metric,
+        'granularity': granularity,
+        'bucket': {'$gte': bucket_start(start, granularity), '$lte': end},
+    }
     if property_type:
         query['property_type'] = property_type
-    if min_price is not None:
-        query['price'] = query.get('price', {})
-        query['price']['$gte'] = min_price
-    if max_price is not None:
-        query['price'] = query.get('price', {})
-        query['price']['$lte'] = max_price
-    if bedrooms is not None:
-        query['bedrooms'] = bedrooms
-    if location:
-        query['location'] = {'$regex': location, '$options': 'i'}
+    if status:
+        query['status'] = status
+    
+    group_id = {'bucket': '$bucket', **{name: f'${name}' for name in dimensions}}
+    rows = await db.analytics_rollups.aggregate([
+        {'$match': query},
+        {'$group': {'_id': group_id, 'count': {'$sum': '$count'}}},
+        {'$sort': {'_id.bucket': 1}},
+    ]).to_list(None)
+    
+    return RollupSeries(
+        metric=metric,
+        granularity=granularity,
+        start=start,
+        end=end,
+        points=[RollupPoint(**row['_id'], count=row['count']) for row in rows]
+    )
 
-    properties = await db.properties.find(query, {'_id': 0}).to_list(1000)
-    for prop in properties:
-        if isinstance(prop['created_at'], str):
-            prop['created_at'] = datetime.fromisoformat(prop['created_at'])
-        if isinstance(prop['updated_at'], str):
-            prop['updated_at'] = datetime.fromisoformat(prop['updated_at'])
+app.include_router(api_router)
 
-    return properties
+# Explicit app-level alias to ensure /api/properties is reachable
+app.add_api_route('/api/properties', get_properties, methods=['GET'], response_model=List[Property])
 
 app.add_middleware(
     CORSMiddleware,
@@ -371,6 +2255,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=['X-Next-Cursor', 'X-Cache', 'X-Role-Counts', 'X-Lease-Expires', 'ETag', 'Last-Modified'],
 )
 
 logging.basicConfig(
@@ -379,8 +2264,171 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def ensure_indexes():
+    # One index at a time, so a spec that cannot be built (e.g. duplicate
+    # emails blocking the unique index) does not hold back the others. Serve
+    # anyway; failures show up in /api/admin/index-report.
+    for collection, models in INDEXES.items():
+        for model in models:
+            name = model.document['name']
+            try:
+                await db[collection].create_indexes([model])
+                index_failures.pop((collection, name), None)
+            except OperationFailure as e:
+                index_failures[(collection, name)] = str(e)
+                logger.error('Could not ensure index %s on %s: %s', name, collection, e)
+
+async def backfill(collection, query: dict, projection: dict, build_set, batch_size: int = 500, guard: tuple = ()) -> int:
+    # $sets build_set(doc) on every document matching `query`, in unordered
+    # bulk_write batches; returns how many documents changed. A None
+    # from build_set skips the document; `guard` fields must still hold the
+    # values read, so a concurrent write is never overwritten.
+    batch, updated = [], 0
+    async for doc in collection.find(query, projection):
+        fields = build_set(doc)
+        if fields is None:
+            continue
+        batch.append(UpdateOne({'_id': doc['_id'], **{field: doc.get(field) for field in guard}}, {'$set': fields}))
+        if len(batch) >= batch_size:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+# Older releases stored these as ISO strings. Keyset predicates and the row
+# serializers expect native dates, so they are converted at startup;
+# migrate_dates.py does the same ahead of a deploy.
+DATE_FIELDS = {
+    'users': ['created_at'],
+    'properties': ['created_at', 'updated_at'],
+    'leads': ['created_at'],
+}
+
+def _converted_date(field: str):
+    def build_set(doc: dict):
+        try:
+            return {field: as_datetime(doc[field])}
+        except ValueError:
+            logger.warning('Unparseable %s %r on %s left as is', field, doc[field], doc['_id'])
+            return None
+    return build_set
+
+async def backfill_dates():
+    for collection, fields in DATE_FIELDS.items():
+        for field in fields:
+            updated = await backfill(db[collection], {field: {'$type': 'string'}}, {'_id': 1, field: 1}, _converted_date(field), guard=(field,))
+            if updated:
+                logger.info('Converted %s.%s to dates on %d documents', collection, field, updated)
+                if collection == 'properties':
+                    # Serialized dates change form (+00:00 -> Z)
+                    listing_cache.clear()
+                    await property_marker.bump()
+
+async def backfill_location_tokens():
+    # Properties written before location_tokens existed (or by older scripts)
+    updated = await backfill(
+        db.properties,
+        {'location_tokens': {'$exists': False}},
+        {'_id': 1, 'location': 1},
+        lambda doc: location_fields(doc.get('location', ''))
+    )
+    if updated:
+        logger.info('Backfilled location_tokens on %d properties', updated)
+
+def _coordinates(doc: dict) -> dict:
+    point = (doc.get('latitude'), doc.get('longitude'))
+    if None in point:
+        point = geocode(doc.get('location', '')) or (None, None)
+    return geo_fields(*point)
+
+async def backfill_coordinates():
+    # Properties written before coordinates existed; a location the gazetteer
+    # does not know gets null coordinates so it is not retried every startup
+    now = utc_now()
+    updated = await backfill(
+        db.properties,
+        {'geo': {'$exists': False}},
+        {'_id': 1, 'location': 1, 'latitude': 1, 'longitude': 1},
+        lambda doc: {**_coordinates(doc), 'updated_at': now}
+    )
+    if updated:
+        # The coordinates are in every response: retire cached pages and
+        # ETags here and, through the marker, in every other worker
+        listing_cache.clear()
+        await property_marker.bump()
+        logger.info('Backfilled coordinates on %d properties', updated)
+
+async def backfill_user_search_terms():
+    # Users registered before search_terms existed (or written by scripts)
+    updated = await backfill(
+        db.users,
+        {'search_terms': {'$exists': False}},
+        {'_id': 1, 'name': 1, 'email': 1},
+        lambda doc: user_search_fields(doc.get('name', ''), doc.get('email', ''))
+    )
+    if updated:
+        logger.info('Backfilled search_terms on %d users', updated)
+
+@app.on_event("startup")
+async def mark_rollups_live():
+    # backfill_rollups.py loads only events older than this, so history and
+    # live increments never overlap
+    await db.meta.update_one({'_id': 'rollups'}, {'$setOnInsert': {'live_since': utc_now()}}, upsert=True)
+
+@app.on_event("startup")
+async def reset_change_markers():
+    # Out-of-band writes (seeding, migrations) never bump the marker, so a
+    # restart retires every listing ETag issued before it
+    await property_marker.bump()
+
+# Strong references keep fire-and-forget tasks from being garbage collected
+background_tasks = set()
+
+def start_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+@app.on_event("startup")
+async def calibrate_password_hasher():
+    if BCRYPT_ROUNDS is None:
+        stored = await db.meta.find_one({'_id': 'bcrypt'})
+        if not stored:
+            await password_hasher.calibrate(BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS)
+        await password_hasher.share_rounds(db.meta)
+        password_hasher.rounds = min(max(password_hasher.rounds, BCRYPT_MIN_ROUNDS), BCRYPT_MAX_ROUNDS)
+    logger.info(f'bcrypt cost {password_hasher.rounds}')
+
+@app.on_event("startup")
+async def start_backfills():
+    start_background(backfill_dates())
+    start_background(backfill_location_tokens())
+    start_background(backfill_user_search_terms())
+    start_background(backfill_coordinates())
+    start_background(property_text_index.sync())
+    start_background(reconcile_counters_periodically())
+    # Leftover segments are replayed even with write-behind switched off
+    start_background(lead_buffer.replay())
+    if LEAD_WRITE_BEHIND:
+        start_background(flush_leads_periodically())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in list(background_tasks):
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+@app.on_event("shutdown")
+async def drain_lead_buffer():
+    # Whatever does not make it stays in the spool for the next startup
+    await lead_buffer.flush()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    password_hasher.shutdown()
     client.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""
+Text normalization and search structures shared by the API server and the seeding scripts.
+"""
+
+import math
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace to single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', stripped.lower()).strip()
+
+def location_fields(location: str) -> dict:
+    """Indexed search fields stored alongside a property's free-text location."""
+    norm = normalize_text(location)
+    return {
+        'location_norm': norm,
+        'location_tokens': sorted(set(norm.split())),
+    }
+
+def user_search_fields(name: str, email: str) -> dict:
+    """Prefix-searchable terms for a user: the email, the full name and each name word."""
+    norm = normalize_text(name)
+    terms = {(email or '').lower(), norm, *norm.split()}
+    terms.discard('')
+    return {'search_terms': sorted(terms)}
+
+# Words too common in listing copy to say anything about relevance
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in into is it its of on or '
+    'the this to with our your you all'.split()
+)
+
+def tokenize(text: str) -> list:
+    """Normalized words of `text`, stopwords dropped."""
+    return [word for word in normalize_text(text).split() if word not in STOPWORDS]
+
+class InvertedIndex:
+    """In-memory term -> postings index with BM25 ranking.
+
+    Documents are a title and a description (title terms count
+    `title_weight` times) plus a `meta` dict the caller filters on.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.postings = {}
+        self.terms = {}
+        self.lengths = {}
+        self.meta = {}
+        self.total_length = 0
+    
+    def __len__(self) -> int:
+        return len(self.lengths)
+    
+    def upsert(self, doc_id: str, title: str, description: str, meta: dict):
+        self.remove(doc_id)
+        counts = {}
+        for word in tokenize(title):
+            counts[word] = counts.get(word, 0) + self.title_weight
+        for word in tokenize(description):
+            counts[word] = counts.get(word, 0) + 1
+        for word, count in counts.items():
+            self.postings.setdefault(word, {})[doc_id] = count
+        length = sum(counts.values())
+        self.terms[doc_id] = list(counts)
+        self.lengths[doc_id] = length
+        self.total_length += length
+        self.meta[doc_id] = meta
+    
+    def update_meta(self, doc_id: str, **changes):
+        if doc_id in self.meta:
+            self.meta[doc_id] = {**self.meta[doc_id], **changes}
+    
+    def remove(self, doc_id: str):
+        if doc_id not in self.lengths:
+            return
+        for word in self.terms.pop(doc_id):
+            postings = self.postings[word]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[word]
+        self.total_length -= self.lengths.pop(doc_id)
+        del self.meta[doc_id]
+    
+    def search(self, query: str, accept=None) -> list:
+        """(score, doc_id) pairs for documents containing any query word, best first.
+
+        Only the postings of the query words are read; `accept(meta)` drops
+        documents failing the caller's filters before they are ranked.
+        """
+        count = len(self.lengths)
+        if not count:
+            return []
+        average = self.total_length / count
+        scores = {}
+        for word in set(tokenize(query)):
+            postings = self.postings.get(word)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = [
+            (score, doc_id) for doc_id, score in scores.items()
+            if accept is None or accept(self.meta[doc_id])
+        ]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked
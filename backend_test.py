@@ -17,6 +17,7 @@ class LuxEstateAPITester:
         self.leads = {}
         self.tests_run = 0
         self.tests_passed = 0
+        self.last_headers = {}
 
     def run_test(self, name, method, endpoint, expected_status, data=None, token=None):
         """Run a single API test"""
@@ -35,6 +36,7 @@ class LuxEstateAPITester:
                 response = requests.post(url, json=data, headers=headers)
             elif method == 'PATCH':
                 response = requests.patch(url, json=data, headers=headers)
+            self.last_headers = response.headers
 
             success = response.status_code == expected_status
             if success:
@@ -56,6 +58,17 @@ class LuxEstateAPITester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
+    def check(self, name, passed, detail=""):
+        """Record a check that is not a single API call"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+        if passed:
+            self.tests_passed += 1
+            print(f"✅ Passed {detail}")
+        else:
+            print(f"❌ Failed {detail}")
+        return passed
+
     def test_user_registration(self):
         """Test user registration for different roles"""
         print("\n=== Testing User Registration ===")
@@ -219,6 +232,22 @@ class LuxEstateAPITester:
             200
         )
 
+        # Test keyset pagination
+        success, response = self.run_test(
+            "Get Properties Page (Sorted by Price)",
+            "GET",
+            "properties?sort=price_asc&limit=5",
+            200
+        )
+
+        # Test invalid cursor
+        success, response = self.run_test(
+            "Get Properties with Invalid Cursor (Should Fail)",
+            "GET",
+            "properties?cursor=not-a-cursor",
+            400
+        )
+
     def test_seller_properties(self):
         """Test seller getting their properties"""
         print("\n=== Testing Seller Properties ===")
@@ -325,6 +354,35 @@ class LuxEstateAPITester:
                 token=self.tokens['admin']
             )
 
+    def test_rate_limiting(self):
+        """Test that repeated failed logins for one account are throttled"""
+        print("\n=== Testing Rate Limiting ===")
+        
+        login_data = {
+            "email": f"ratelimit_{datetime.now().strftime('%H%M%S')}@test.com",
+            "password": "WrongPass123!"
+        }
+        # Spend the account's burst; unknown accounts get 401 until then
+        for _ in range(20):
+            response = requests.post(f"{self.api_url}/auth/login", json=login_data)
+            if response.status_code == 429:
+                break
+        
+        success, response = self.run_test(
+            "Login Over Rate Limit (Should Fail)",
+            "POST",
+            "auth/login",
+            429,
+            data=login_data
+        )
+        if success:
+            retry_after = self.last_headers.get('Retry-After', '')
+            self.check(
+                "Rate Limit Retry-After Header",
+                retry_after.isdigit() and int(retry_after) > 0,
+                f"- Retry-After: {retry_after or 'missing'}"
+            )
+
     def test_unauthorized_access(self):
         """Test unauthorized access to protected endpoints"""
         print("\n=== Testing Unauthorized Access ===")
@@ -353,7 +411,7 @@ def main():
     if base_url:
         print(f"🏠 Starting LuxEstate API Testing against {base_url}...")
     else:
-    print("🏠 Starting LuxEstate API Testing...")
+        print("🏠 Starting LuxEstate API Testing...")
         print(f"   Using backend URL: {os.environ.get('BACKEND_URL', 'http://localhost:8080')}")
     
     tester = LuxEstateAPITester(base_url=base_url)
@@ -368,6 +426,7 @@ def main():
     tester.test_property_detail()
     tester.test_lead_creation()
     tester.test_admin_functions()
+    tester.test_rate_limiting()
     tester.test_unauthorized_access()
 
     # Print final results
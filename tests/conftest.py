@@ -0,0 +1,74 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Set before server is imported (its load_dotenv never overrides these)
+os.environ['MONGO_URL'] = 'mongodb://localhost:27017'
+os.environ['DB_NAME'] = 'luxestate_test'
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+for limit in ('AUTH_IP_RATE', 'LOGIN_ACCOUNT_RATE', 'LEAD_IP_RATE'):
+    os.environ.setdefault(limit, '0')
+
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    """A fresh mongomock database with every per-process cache reset."""
+    mock = AsyncMongoMockClient(tz_aware=True)
+    monkeypatch.setattr(server, 'client', mock)
+    monkeypatch.setattr(server, 'db', mock['luxestate_test'])
+    monkeypatch.setattr(server, 'listing_cache', server.ListingCache(server.LISTING_CACHE_SIZE, server.LISTING_CACHE_TTL))
+    monkeypatch.setattr(server, 'property_marker', server.ChangeMarker('properties', server.CHANGE_MARKER_TTL))
+    monkeypatch.setattr(server, 'user_marker', server.ChangeMarker('users', server.CHANGE_MARKER_TTL))
+    monkeypatch.setattr(server, 'property_text_index', server.PropertyTextIndex(server.TEXT_INDEX_SYNC_LAG))
+    monkeypatch.setattr(server, 'user_cache', server.TTLCache(server.USER_CACHE_SIZE, server.USER_CACHE_TTL))
+    monkeypatch.setattr(server, 'token_cache', server.TTLCache(server.TOKEN_CACHE_SIZE, server.TOKEN_CACHE_TTL))
+    monkeypatch.setattr(server, 'lead_buffer', server.LeadBuffer(tmp_path / 'spool', server.LEAD_BATCH_SIZE, False))
+    monkeypatch.setattr(server, 'password_hasher', server.PasswordHasher(1, 8, 4))
+    monkeypatch.setattr(server, 'index_failures', {})
+    return server.db
+
+@pytest.fixture
+def client(db):
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post('/api/auth/register', json={'email': 'admin@test.com', 'password': 'pw', 'name': 'Admin', 'role': 'admin'})
+    return {'Authorization': f"Bearer {response.json()['token']}"}
+
+@pytest.fixture
+def seller_headers(client):
+    response = client.post('/api/auth/register', json={'email': 'seller@test.com', 'password': 'pw', 'name': 'Seller', 'role': 'seller'})
+    return {'Authorization': f"Bearer {response.json()['token']}"}
+
+def property_payload(**overrides) -> dict:
+    payload = {
+        'title': 'Villa',
+        'description': 'A villa',
+        'price': 1000000,
+        'location': 'Beverly Hills, CA',
+        'bedrooms': 4,
+        'bathrooms': 3,
+        'area': 3000,
+        'property_type': 'villa',
+        'images': [],
+    }
+    payload.update(overrides)
+    return payload
+
+def analytics_matches_recount(client) -> bool:
+    """Whether the incrementally kept property counters agree with a full recount."""
+    async def compare():
+        stored = await server.db.meta.find_one({'_id': 'analytics'}) or {}
+        counts = await server.reconcile_counters()
+        return all(stored.get(field, 0) == count for field, count in counts.items() if field.endswith('_properties'))
+    return client.portal.call(compare)
@@ -0,0 +1,33 @@
+import asyncio
+
+import server
+
+def test_backfills_fill_missing_fields_only(db):
+    async def run():
+        await db.properties.insert_many([
+            {'id': 'old', 'location': 'Tribeca, New York, NY'},
+            {'id': 'unknown', 'location': 'Atlantis'},
+            {'id': 'pinned', 'location': 'Atlantis', 'latitude': 1.5, 'longitude': 2.5},
+        ])
+        await db.users.insert_one({'id': 'u', 'name': 'Jane Doe', 'email': 'jane@test.com'})
+        await server.backfill_location_tokens()
+        await server.backfill_coordinates()
+        await server.backfill_user_search_terms()
+        props = {doc['id']: doc async for doc in db.properties.find({}, {'_id': 0})}
+        return props, await db.users.find_one({'id': 'u'})
+
+    props, user = asyncio.run(run())
+    assert props['old']['location_tokens'] == server.location_fields('Tribeca, New York, NY')['location_tokens']
+    assert (props['old']['latitude'], props['old']['longitude']) == (40.7163, -74.0086)
+    assert props['unknown']['geo'] is None and props['unknown']['latitude'] is None
+    assert props['pinned']['geo'] == {'type': 'Point', 'coordinates': [2.5, 1.5]}
+    assert user['search_terms'] == server.user_search_fields('Jane Doe', 'jane@test.com')['search_terms']
+
+def test_backfill_batches(db):
+    async def run():
+        await db.users.insert_many([{'id': str(i), 'name': f'User {i}', 'email': f'u{i}@test.com'} for i in range(7)])
+        updated = await server.backfill(db.users, {'search_terms': {'$exists': False}}, {'_id': 1, 'name': 1, 'email': 1},
+                                        lambda doc: server.user_search_fields(doc['name'], doc['email']), batch_size=3)
+        again = await server.backfill(db.users, {'search_terms': {'$exists': False}}, {'_id': 1}, lambda doc: {})
+        return updated, again
+    assert asyncio.run(run()) == (7, 0)
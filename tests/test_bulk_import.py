@@ -0,0 +1,51 @@
+import json
+
+import server
+from .conftest import analytics_matches_recount, property_payload
+
+def test_json_import_reports_each_item(client, seller_headers, monkeypatch):
+    monkeypatch.setattr(server, 'BULK_IMPORT_BATCH_SIZE', 2)
+    items = [property_payload(title='One'), {'title': 'Missing fields'}, property_payload(title='Two'), property_payload(price='lots')]
+
+    response = client.post('/api/properties/bulk', json=items, headers=seller_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['created'], body['failed']) == (2, 2)
+    assert [entry['index'] for entry in body['items']] == [0, 1, 2, 3]
+    assert [entry['status'] for entry in body['items']] == ['created', 'error', 'created', 'error']
+    assert body['items'][3]['errors'][0]['loc'] == ['price']
+
+    listed = client.get('/api/properties').json()
+    assert sorted(prop['title'] for prop in listed) == ['One', 'Two']
+    assert analytics_matches_recount(client)
+
+def test_ndjson_import_streams_the_report(client, seller_headers):
+    lines = b'\n'.join([json.dumps(property_payload(title='One')).encode(), b'{not json', b''])
+    response = client.post(
+        '/api/properties/bulk', content=lines,
+        headers={**seller_headers, 'Content-Type': 'application/x-ndjson', 'Accept': 'application/x-ndjson'}
+    )
+    entries = [json.loads(line) for line in response.text.splitlines()]
+    assert [entry.get('status') for entry in entries[:2]] == ['created', 'error']
+    assert entries[-1] == {'created': 1, 'failed': 1}
+
+def test_failed_writes_are_reported_and_not_counted(client, seller_headers, monkeypatch):
+    original = server.new_property
+
+    def colliding(data, seller_id):
+        prop, doc = original(data, seller_id)
+        if data.title == 'Taken':
+            prop.id = doc['id'] = 'taken'
+        return prop, doc
+    monkeypatch.setattr(server, 'new_property', colliding)
+    client.post('/api/properties/bulk', json=[property_payload(title='Taken')], headers=seller_headers)
+
+    body = client.post('/api/properties/bulk', json=[property_payload(title='Taken'), property_payload(title='Fresh')], headers=seller_headers).json()
+    assert [entry['status'] for entry in body['items']] == ['error', 'created']
+    assert body['items'][0]['index'] == 0
+    assert analytics_matches_recount(client)
+
+def test_import_limits(client, seller_headers, monkeypatch):
+    assert client.post('/api/properties/bulk', json={'title': 'x'}, headers=seller_headers).status_code == 400
+    monkeypatch.setattr(server, 'BULK_IMPORT_MAX_ITEMS', 1)
+    assert client.post('/api/properties/bulk', json=[{}, {}], headers=seller_headers).status_code == 413
@@ -0,0 +1,46 @@
+import pytest
+
+import server
+from .conftest import analytics_matches_recount, property_payload
+
+@pytest.fixture
+def pending_ids(client, seller_headers) -> list:
+    return [
+        client.post('/api/properties', json=property_payload(title=f'Villa {number}', property_type=kind), headers=seller_headers).json()['id']
+        for number, kind in enumerate(['villa', 'villa', 'apartment'])
+    ]
+
+def test_approve_by_ids_reports_only_what_changed(client, admin_headers, pending_ids):
+    first = client.patch('/api/properties', json={'status': 'approved', 'ids': pending_ids[:2]}, headers=admin_headers).json()
+    assert first['changed'] == 2
+    assert sorted(first['ids']) == sorted(pending_ids[:2])
+
+    again = client.patch('/api/properties', json={'status': 'approved', 'ids': pending_ids}, headers=admin_headers).json()
+    assert again['ids'] == [pending_ids[2]]
+    assert analytics_matches_recount(client)
+
+def test_approve_by_filter_in_batches(client, admin_headers, pending_ids, monkeypatch):
+    monkeypatch.setattr(server, 'BULK_STATUS_BATCH_SIZE', 1)
+    result = client.patch('/api/properties', json={'status': 'approved', 'filter': {'property_type': 'villa'}}, headers=admin_headers).json()
+    assert sorted(result['ids']) == sorted(pending_ids[:2])
+
+    approved = client.get('/api/properties', params={'status': 'approved'}).json()
+    assert sorted(prop['id'] for prop in approved) == sorted(pending_ids[:2])
+    assert analytics_matches_recount(client)
+
+def test_concurrent_change_is_not_counted_twice(client, admin_headers, pending_ids, monkeypatch):
+    # Another moderator rejects one item between the read and the update
+    original = server.apply_status_change
+
+    async def racing(batch, changes):
+        await server.db.properties.update_one({'id': pending_ids[0]}, {'$set': {'status': 'rejected'}})
+        return await original(batch, changes)
+    monkeypatch.setattr(server, 'apply_status_change', racing)
+
+    result = client.patch('/api/properties', json={'status': 'approved', 'ids': pending_ids}, headers=admin_headers).json()
+    assert sorted(result['ids']) == sorted(pending_ids[1:])
+
+def test_request_validation(client, admin_headers, seller_headers, pending_ids):
+    assert client.patch('/api/properties', json={'status': 'approved', 'ids': pending_ids}, headers=seller_headers).status_code == 403
+    assert client.patch('/api/properties', json={'status': 'approved'}, headers=admin_headers).status_code == 400
+    assert client.patch('/api/properties', json={'status': 'approved', 'filter': {}}, headers=admin_headers).status_code == 400
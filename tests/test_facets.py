@@ -0,0 +1,44 @@
+import pytest
+
+from .conftest import property_payload
+
+@pytest.fixture
+def listed(client, seller_headers):
+    for property_type, bedrooms, price in [('villa', 4, 3000000), ('villa', 5, 12000000), ('apartment', 2, 800000), ('penthouse', 3, 4000000)]:
+        client.post('/api/properties', json=property_payload(property_type=property_type, bedrooms=bedrooms, price=price), headers=seller_headers)
+
+def counts(rows: list) -> dict:
+    return {row['value']: row['count'] for row in rows}
+
+def test_unfiltered_counts(client, listed):
+    facets = client.get('/api/properties/facets').json()
+    assert facets['total'] == 4
+    assert counts(facets['property_type']) == {'apartment': 1, 'penthouse': 1, 'villa': 2}
+    assert {bucket['min']: bucket['count'] for bucket in facets['price']} == {0: 1, 2500000: 2, 10000000: 1}
+
+def test_a_facet_ignores_its_own_filter(client, listed):
+    facets = client.get('/api/properties/facets', params={'property_type': 'villa'}).json()
+    assert facets['total'] == 2
+    # The other types stay visible so the sidebar can offer them
+    assert counts(facets['property_type']) == {'apartment': 1, 'penthouse': 1, 'villa': 2}
+    assert counts(facets['bedrooms']) == {4: 1, 5: 1}
+
+def test_price_filter_narrows_the_other_facets_only(client, listed):
+    facets = client.get('/api/properties/facets', params={'min_price': 2500000, 'max_price': 5000000}).json()
+    assert facets['total'] == 2
+    assert counts(facets['property_type']) == {'penthouse': 1, 'villa': 1}
+    assert sum(bucket['count'] for bucket in facets['price']) == 4
+
+def test_location_filter_narrows_every_facet(client, seller_headers, listed):
+    client.post('/api/properties', json=property_payload(location='Malibu, CA', property_type='villa'), headers=seller_headers)
+    facets = client.get('/api/properties/facets', params={'location': 'malibu', 'property_type': 'apartment'}).json()
+    assert facets['total'] == 0
+    assert counts(facets['property_type']) == {'villa': 1}
+
+def test_facets_are_invalidated_by_writes(client, seller_headers, listed):
+    assert client.get('/api/properties/facets').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/properties/facets').headers['X-Cache'] == 'HIT'
+    client.post('/api/properties', json=property_payload(property_type='apartment'), headers=seller_headers)
+    facets = client.get('/api/properties/facets')
+    assert facets.headers['X-Cache'] == 'MISS'
+    assert counts(facets.json()['property_type'])['apartment'] == 2
@@ -0,0 +1,92 @@
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+from gazetteer import geocode, geo_fields
+from .conftest import property_payload
+
+TEST_MONGO_URL = os.environ.get('TEST_MONGO_URL')
+
+def test_geocode_prefers_the_most_specific_place():
+    assert geocode('Carbon Beach, Malibu, CA') == (34.0365, -118.6536)
+    assert geocode('Malibu, CA') == (34.0259, -118.7798)
+    assert geocode('Tribeca') == (40.7163, -74.0086)
+    assert geocode('Tribeca, New York, NY, USA') == (40.7163, -74.0086)
+    assert geocode('Atlantis') is None
+    assert geocode('') is None
+
+def test_geo_fields():
+    assert geo_fields(34.0, -118.0) == {'latitude': 34.0, 'longitude': -118.0, 'geo': {'type': 'Point', 'coordinates': [-118.0, 34.0]}}
+    assert geo_fields(None, -118.0) == {'latitude': None, 'longitude': None, 'geo': None}
+
+def test_create_property_geocodes_unless_given(client, seller_headers):
+    geocoded = client.post('/api/properties', json=property_payload(location='SoHo, New York, NY'), headers=seller_headers).json()
+    assert (geocoded['latitude'], geocoded['longitude']) == (40.7233, -74.0030)
+    pinned = client.post('/api/properties', json=property_payload(location='Atlantis', latitude=10, longitude=20), headers=seller_headers).json()
+    assert (pinned['latitude'], pinned['longitude']) == (10, 20)
+
+def test_backfill_coordinates_retires_cached_pages(client, db):
+    assert client.get('/api/properties').headers['X-Cache'] == 'MISS'
+    version = server.property_marker._value['version']
+
+    async def legacy_row():
+        await db.properties.insert_one({**property_payload(location='Montauk'), 'id': 'legacy', 'status': 'approved', 'seller_id': 's', 'created_at': server.utc_now(), 'updated_at': server.utc_now()})
+        await server.backfill_coordinates()
+    client.portal.call(legacy_row)
+
+    assert server.property_marker._value['version'] == version + 1
+    response = client.get('/api/properties')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json()[0]['latitude'] == 41.0359
+
+def test_near_rejects_bad_input(client):
+    assert client.get('/api/properties/near').status_code == 400
+    assert client.get('/api/properties/near', params={'near': 'Atlantis'}).status_code == 404
+    assert client.get('/api/properties/near', params={'bbox': '5,2,3,4'}).status_code == 400
+    assert client.get('/api/properties/near', params={'lat': 1, 'lng': 2, 'unit': 'ft'}).status_code == 400
+
+@pytest.mark.skipif(not TEST_MONGO_URL, reason='needs a real MongoDB (mongomock has no $geoNear): set TEST_MONGO_URL')
+def test_near_and_bbox_against_mongodb(db, monkeypatch):
+    real = AsyncIOMotorClient(TEST_MONGO_URL, tz_aware=True)
+    name = f'luxestate_geo_{uuid.uuid4().hex[:8]}'
+    monkeypatch.setattr(server, 'client', real)
+    monkeypatch.setattr(server, 'db', real[name])
+
+    def listing(doc_id, place, status='approved'):
+        return {
+            **property_payload(location=place),
+            **geo_fields(*geocode(place)),
+            'id': doc_id,
+            'status': status,
+            'seller_id': 's',
+            'created_at': server.utc_now(),
+            'updated_at': server.utc_now(),
+        }
+
+    with TestClient(server.app) as client:  # startup builds the 2dsphere index
+        try:
+            client.portal.call(server.db.properties.insert_many, [
+                listing('dume', 'Point Dume, Malibu, CA'),
+                listing('colony', 'Malibu Colony, Malibu, CA', status='pending'),
+                listing('carbon', 'Carbon Beach, Malibu, CA'),
+                listing('flats', 'The Flats, Beverly Hills, CA'),
+            ])
+
+            near = client.get('/api/properties/near', params={'near': 'Malibu, CA', 'radius': 20}).json()
+            assert [prop['id'] for prop in near] == ['dume', 'colony', 'carbon']
+            assert near[0]['distance'] < near[1]['distance'] < near[2]['distance'] <= 20
+
+            approved = client.get('/api/properties/near', params={'near': 'Malibu, CA', 'radius': 20, 'status': 'approved'}).json()
+            assert [prop['id'] for prop in approved] == ['dume', 'carbon']
+
+            miles = client.get('/api/properties/near', params={'near': 'Malibu, CA', 'radius': 20, 'unit': 'mi'}).json()
+            assert miles[0]['distance'] == pytest.approx(near[0]['distance'] / 1.609344, rel=1e-6)
+
+            boxed = client.get('/api/properties/near', params={'bbox': '-118.9,33.95,-118.68,34.1'}).json()
+            assert sorted(prop['id'] for prop in boxed) == ['colony', 'dume']
+        finally:
+            client.portal.call(real.drop_database, name)
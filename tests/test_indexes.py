@@ -0,0 +1,33 @@
+import server
+
+def test_failed_index_does_not_block_the_rest(db, client):
+    # Startup already built everything on the empty database; rebuild on one
+    # that a twice-run seeder left with duplicate emails
+    async def duplicate_emails():
+        await db.users.drop_indexes()
+        await db.users.insert_many([
+            {'id': 'a', 'email': 'seller1@luxestate.com', 'role': 'seller', 'created_at': server.utc_now()},
+            {'id': 'b', 'email': 'seller1@luxestate.com', 'role': 'seller', 'created_at': server.utc_now()},
+        ])
+        await server.ensure_indexes()
+        return await db.users.index_information()
+    info = client.portal.call(duplicate_emails)
+
+    assert 'email_1' not in info
+    assert {'id_1', 'role_1_created_at_1_id_1', 'created_at_1_id_1', 'search_terms_1_role_1'} <= set(info)
+    assert ('users', 'email_1') in server.index_failures
+
+def test_index_report_lists_failed_indexes(db, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(server.index_failures, ('users', 'email_1'), 'E11000 duplicate key')
+    monkeypatch.setitem(server.index_failures, ('users', 'id_1'), 'stale failure, since built')
+
+    async def explain_unsupported(self, *args, **kwargs):
+        return {'queryPlanner': {'winningPlan': {'stage': 'IXSCAN', 'indexName': 'x'}}}
+
+    async def drop_email_index():
+        await db.users.drop_index('email_1')
+    client.portal.call(drop_email_index)
+    monkeypatch.setattr(type(db.users.find({})), 'explain', explain_unsupported, raising=False)
+
+    report = client.get('/api/admin/index-report', headers=admin_headers).json()
+    assert report['failed'] == [{'collection': 'users', 'index': 'email_1', 'error': 'E11000 duplicate key'}]
@@ -0,0 +1,61 @@
+import asyncio
+import shutil
+
+import server
+
+def make_lead(**overrides) -> server.Lead:
+    fields = {'property_id': 'p1', 'name': 'Lead', 'email': 'lead@test.com', 'phone': '555', 'message': 'Hello'}
+    fields.update(overrides)
+    return server.Lead(**fields)
+
+def test_replay_stores_spooled_leads_once(db, tmp_path):
+    spool_dir = tmp_path / 'spool'
+
+    async def run():
+        await db.leads.create_index('id', unique=True)
+        # A worker that dies before flushing leaves its segment on disk
+        crashed = server.LeadBuffer(spool_dir, batch_size=100, fsync=False)
+        lead = make_lead()
+        crashed.add(lead)
+        crashed.add(make_lead(name='Second'))
+        segment = next(spool_dir.glob('leads-*.ndjson'))
+        # A copy stands in for a segment whose flush inserted but never unlinked
+        shutil.copy(segment, spool_dir / 'leads-9999999999999999999-0.ndjson')
+        del crashed  # drops the segment's lock with its file
+
+        restarted = server.LeadBuffer(spool_dir, batch_size=100, fsync=False)
+        await restarted.replay()
+        return restarted, lead, await db.leads.count_documents({}), await db.leads.count_documents({'id': lead.id})
+
+    restarted, lead, total, same_id = asyncio.run(run())
+    assert restarted.replayed == 4
+    assert restarted.flushed == 2
+    assert (total, same_id) == (2, 1)
+    assert not list(spool_dir.glob('leads-*.ndjson'))
+
+def test_replay_skips_torn_lines(db, tmp_path):
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    lead = make_lead()
+    (spool_dir / 'leads-1-1.ndjson').write_text(lead.model_dump_json() + '\n{"id": "torn', encoding='utf-8')
+
+    buffer = server.LeadBuffer(spool_dir, batch_size=100, fsync=False)
+    asyncio.run(buffer.replay())
+    assert buffer.replayed == 1
+    assert asyncio.run(db.leads.count_documents({'id': lead.id})) == 1
+
+def test_replay_skips_segments_removed_after_listing(db, tmp_path, monkeypatch):
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    gone = spool_dir / 'leads-1-1.ndjson'
+    kept = spool_dir / 'leads-2-1.ndjson'
+    lead = make_lead()
+    kept.write_text(lead.model_dump_json() + '\n', encoding='utf-8')
+
+    # Another worker flushes and unlinks `gone` between our glob and open
+    listing = [gone, kept]
+    monkeypatch.setattr(type(spool_dir), 'glob', lambda self, pattern: iter(listing))
+    buffer = server.LeadBuffer(spool_dir, batch_size=100, fsync=False)
+    asyncio.run(buffer.replay())
+    assert buffer.replayed == 1
+    assert asyncio.run(db.leads.count_documents({'id': lead.id})) == 1
@@ -0,0 +1,92 @@
+import server
+from .conftest import property_payload
+
+def test_own_write_drops_only_matching_pages(client, seller_headers):
+    client.post('/api/properties', json=property_payload(property_type='apartment'), headers=seller_headers)
+    assert client.get('/api/properties', params={'property_type': 'apartment'}).headers['X-Cache'] == 'MISS'
+    assert client.get('/api/properties').headers['X-Cache'] == 'MISS'
+
+    client.post('/api/properties', json=property_payload(property_type='villa'), headers=seller_headers)
+
+    apartments = client.get('/api/properties', params={'property_type': 'apartment'})
+    assert apartments.headers['X-Cache'] == 'HIT'
+    everything = client.get('/api/properties')
+    assert everything.headers['X-Cache'] == 'MISS'
+    assert len(everything.json()) == 2
+    # A surviving page is served under the current version's validators
+    assert apartments.headers['ETag'].startswith(f'"{server.property_marker._value["version"]}-')
+
+def test_out_of_band_write_flushes_cache(client, db):
+    assert client.get('/api/properties').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/properties').headers['X-Cache'] == 'HIT'
+
+    async def seed():
+        await db.properties.insert_one({**property_payload(), 'id': 'seeded', 'status': 'approved', 'seller_id': 's', 'created_at': server.utc_now(), 'updated_at': server.utc_now()})
+        await db.meta.update_one({'_id': 'properties'}, {'$inc': {'version': 1}, '$set': {'updated_at': server.utc_now()}})
+    client.portal.call(seed)
+    server.property_marker._expires_at = 0
+
+    response = client.get('/api/properties')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert [prop['id'] for prop in response.json()] == ['seeded']
+    assert server.listing_cache.stats()['invalidations'] == 1
+
+def test_advance_keeps_entries_only_for_consecutive_versions():
+    cache = server.ListingCache(8, 60)
+    cache.sync(5)
+    cache.put('a', {}, b'[]', None, cache.generation)
+    cache.advance(6)
+    assert cache.get('a') is not None
+    cache.advance(8)
+    assert cache.get('a') is None
+    assert cache.version == 8
+
+def test_put_after_write_is_dropped():
+    cache = server.ListingCache(8, 60)
+    generation = cache.generation
+    cache.invalidate({'status': 'approved'})
+    cache.put('a', {}, b'[]', None, generation)
+    assert cache.get('a') is None
+
+def test_etag_revalidation(client, seller_headers):
+    first = client.get('/api/properties')
+    etag = first.headers['ETag']
+    assert client.get('/api/properties', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/properties', json=property_payload(), headers=seller_headers)
+    changed = client.get('/api/properties', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_detail_etag(client, seller_headers):
+    prop = client.post('/api/properties', json=property_payload(), headers=seller_headers).json()
+    first = client.get(f"/api/properties/{prop['id']}")
+    assert client.get(f"/api/properties/{prop['id']}", headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+def test_last_modified_revalidation(client, seller_headers):
+    client.post('/api/properties', json=property_payload(), headers=seller_headers)
+    first = client.get('/api/properties')
+    since = first.headers['Last-Modified']
+    assert client.get('/api/properties', headers={'If-Modified-Since': since}).status_code == 304
+    # If-None-Match wins when both are sent
+    assert client.get('/api/properties', headers={'If-Modified-Since': since, 'If-None-Match': '"stale"'}).status_code == 200
+    assert client.get('/api/properties', headers={'If-Modified-Since': 'not a date'}).status_code == 200
+
+def test_etags_differ_per_query_and_accept_weak_lists(client):
+    plain = client.get('/api/properties').headers['ETag']
+    filtered = client.get('/api/properties', params={'property_type': 'villa'}).headers['ETag']
+    assert plain != filtered
+    response = client.get('/api/properties', headers={'If-None-Match': f'W/"other", W/{plain}'})
+    assert response.status_code == 304
+
+def test_moderation_drops_pages_of_both_statuses(client, seller_headers, admin_headers):
+    prop = client.post('/api/properties', json=property_payload(), headers=seller_headers).json()
+    pending = client.get('/api/properties', params={'status': 'pending'})
+    assert len(pending.json()) == 1
+    assert client.get('/api/properties', params={'status': 'approved'}).json() == []
+
+    client.patch(f"/api/properties/{prop['id']}", json={'status': 'approved'}, headers=admin_headers)
+
+    assert client.get('/api/properties', params={'status': 'pending'}).json() == []
+    assert [found['id'] for found in client.get('/api/properties', params={'status': 'approved'}).json()] == [prop['id']]
+    assert client.get('/api/properties', params={'status': 'pending'}, headers={'If-None-Match': pending.headers['ETag']}).status_code == 200
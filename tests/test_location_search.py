@@ -0,0 +1,41 @@
+import pytest
+
+import server
+from .conftest import property_payload
+
+LOCATIONS = ['Beverly Hills, CA', 'São Paulo, Brazil', 'Hills Road, Cambridge', 'West Hollywood, CA']
+
+@pytest.fixture
+def listed(client, seller_headers):
+    for location in LOCATIONS:
+        client.post('/api/properties', json=property_payload(location=location), headers=seller_headers)
+
+def locations(client, query: str) -> list:
+    return sorted(prop['location'] for prop in client.get('/api/properties', params={'location': query}).json())
+
+def test_words_match_token_prefixes_only(client, listed):
+    assert locations(client, 'erly') == []
+    assert locations(client, 'bev') == ['Beverly Hills, CA']
+    assert locations(client, 'hills') == ['Beverly Hills, CA', 'Hills Road, Cambridge']
+
+def test_case_accents_and_punctuation_are_ignored(client, listed):
+    assert locations(client, 'SAO paulo') == ['São Paulo, Brazil']
+    assert locations(client, 'west-hollywood') == ['West Hollywood, CA']
+
+def test_multiple_words_must_appear_as_a_phrase(client, listed):
+    assert locations(client, 'beverly hills') == ['Beverly Hills, CA']
+    assert locations(client, 'hills beverly') == []
+    assert locations(client, 'hills ro') == ['Hills Road, Cambridge']
+
+def test_regex_characters_are_literal(client, listed):
+    response = client.get('/api/properties', params={'location': 'bev(erly'})
+    assert response.status_code == 200
+    assert [prop['location'] for prop in response.json()] == []
+
+def test_cache_matching_agrees_with_the_query(client, listed):
+    # property_matches decides which cached pages a write drops, so it has to
+    # select exactly what the Mongo query selects
+    for query in ('erly', 'bev', 'hills', 'beverly hills', 'hills beverly', 'sao'):
+        norm = server.normalize_text(query)
+        expected = sorted(loc for loc in LOCATIONS if server.property_matches({'location': norm}, {'location': loc}))
+        assert locations(client, query) == expected
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import server
+from .conftest import property_payload
+
+def pending(db, client, count: int) -> list:
+    async def insert():
+        base = server.utc_now() - timedelta(days=1)
+        docs = [
+            {**property_payload(), 'id': f'p{i}', 'status': 'pending', 'seller_id': 's',
+             'created_at': base + timedelta(minutes=i), 'updated_at': base + timedelta(minutes=i)}
+            for i in range(count)
+        ]
+        await db.properties.insert_many(docs)
+    client.portal.call(insert)
+
+def lease(db, client, doc_id: str) -> dict:
+    async def read():
+        return await db.properties.find_one({'id': doc_id}, {'_id': 0, 'lease_owner': 1, 'lease_until': 1})
+    return client.portal.call(read)
+
+def test_claim_returns_held_items_first_and_renews_them(db, client, admin_headers):
+    pending(db, client, 3)
+    first = client.post('/api/moderation/claim', params={'limit': 3, 'lease': 60}, headers=admin_headers).json()
+    assert [prop['id'] for prop in first] == ['p0', 'p1', 'p2']
+    client.post('/api/moderation/release', json={'ids': ['p0', 'p1']}, headers=admin_headers)
+    before = lease(db, client, 'p2')['lease_until']
+
+    again = client.post('/api/moderation/claim', params={'limit': 1, 'lease': 600}, headers=admin_headers).json()
+    assert [prop['id'] for prop in again] == ['p2']
+    assert lease(db, client, 'p2')['lease_until'] > before
+    assert lease(db, client, 'p0').get('lease_owner') is None
+
+def test_claim_fills_from_unclaimed_after_held(db, client, admin_headers):
+    pending(db, client, 3)
+    client.post('/api/moderation/claim', params={'limit': 3}, headers=admin_headers)
+    client.post('/api/moderation/release', json={'ids': ['p0', 'p1']}, headers=admin_headers)
+
+    claimed = client.post('/api/moderation/claim', params={'limit': 2}, headers=admin_headers).json()
+    assert [prop['id'] for prop in claimed] == ['p2', 'p0']
+
+def test_claim_skips_items_leased_to_someone_else(db, client, admin_headers):
+    pending(db, client, 2)
+
+    async def other_admin():
+        await db.properties.update_one({'id': 'p0'}, {'$set': {'lease_owner': 'other', 'lease_until': server.utc_now() + timedelta(minutes=5)}})
+    client.portal.call(other_admin)
+
+    claimed = client.post('/api/moderation/claim', params={'limit': 2}, headers=admin_headers).json()
+    assert [prop['id'] for prop in claimed] == ['p1']
+    assert 'lease_owner' not in claimed[0]
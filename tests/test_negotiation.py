@@ -0,0 +1,20 @@
+import pytest
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+@pytest.mark.parametrize('path', ['/api/properties', '/api/leads', '/api/users'])
+def test_both_forms_vary_on_accept(client, admin_headers, path):
+    as_json = client.get(path, headers=admin_headers)
+    as_ndjson = client.get(path, headers={**admin_headers, **NDJSON})
+
+    assert as_json.headers['content-type'].startswith('application/json')
+    assert as_ndjson.headers['content-type'].startswith('application/x-ndjson')
+    assert as_json.headers['vary'] == 'Accept'
+    assert as_ndjson.headers['vary'] == 'Accept'
+
+def test_not_modified_listing_varies_on_accept(client):
+    first = client.get('/api/properties')
+    again = client.get('/api/properties', headers={'If-None-Match': first.headers['etag']})
+
+    assert again.status_code == 304
+    assert again.headers['vary'] == 'Accept'
@@ -0,0 +1,36 @@
+import server
+from passwords import hash_password
+
+def test_needs_rehash_only_upgrades():
+    hasher = server.PasswordHasher(1, 8, 5)
+    assert hasher.needs_rehash(hash_password('pw', 4))
+    assert not hasher.needs_rehash(hash_password('pw', 5))
+    assert not hasher.needs_rehash(hash_password('pw', 6))
+    hasher.shutdown()
+
+def test_replicas_adopt_the_first_recorded_cost(db, client):
+    first = server.PasswordHasher(1, 8, 5)
+    second = server.PasswordHasher(1, 8, 6)
+
+    async def share():
+        await first.share_rounds(db.meta)
+        await second.share_rounds(db.meta)
+    client.portal.call(share)
+
+    assert first.rounds == second.rounds == 5
+    first.shutdown()
+    second.shutdown()
+
+def test_login_keeps_a_higher_cost_hash(db, client):
+    client.post('/api/auth/register', json={'email': 'buyer@test.com', 'password': 'pw', 'name': 'Buyer', 'role': 'buyer'})
+    stronger = hash_password('pw', 5)
+
+    async def set_password():
+        await db.users.update_one({'email': 'buyer@test.com'}, {'$set': {'password': stronger}})
+    client.portal.call(set_password)
+
+    assert client.post('/api/auth/login', json={'email': 'buyer@test.com', 'password': 'pw'}).status_code == 200
+
+    async def stored():
+        return (await db.users.find_one({'email': 'buyer@test.com'}))['password']
+    assert client.portal.call(stored) == stronger
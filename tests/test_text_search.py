@@ -0,0 +1,74 @@
+import server
+from text_search import InvertedIndex
+from .conftest import property_payload
+
+def test_bm25_ranks_rarer_and_title_terms_higher():
+    index = InvertedIndex()
+    index.upsert('a', 'Ocean villa', 'Pool and garden', {})
+    index.upsert('b', 'Garden flat', 'Quiet street near the ocean', {})
+    index.upsert('c', 'Loft', 'A garden terrace', {})
+
+    # "ocean" is in the title of a and only the description of b
+    assert [doc_id for _, doc_id in index.search('ocean')] == ['a', 'b']
+    # Matching both words beats matching the more common one alone
+    assert index.search('ocean garden')[0][1] in ('a', 'b')
+    assert index.search('ocean garden')[-1][1] == 'c'
+
+def test_equal_scores_break_ties_by_id():
+    index = InvertedIndex()
+    index.upsert('b', 'Villa', '', {})
+    index.upsert('a', 'Villa', '', {})
+    assert [doc_id for _, doc_id in index.search('villa')] == ['a', 'b']
+
+def test_upsert_and_remove_keep_postings_and_lengths_consistent():
+    index = InvertedIndex()
+    index.upsert('a', 'Ocean villa', 'Pool', {'status': 'approved'})
+    index.upsert('b', 'Villa', 'Garden', {'status': 'approved'})
+    index.upsert('a', 'Mountain cabin', 'Pool', {'status': 'pending'})
+
+    assert 'ocean' not in index.postings
+    assert set(index.postings['villa']) == {'b'}
+    assert index.meta['a'] == {'status': 'pending'}
+    assert index.total_length == sum(index.lengths.values())
+
+    index.remove('a')
+    index.remove('missing')
+    assert len(index) == 1
+    assert 'pool' not in index.postings
+    assert index.total_length == index.lengths['b']
+
+def test_accept_filters_on_meta():
+    index = InvertedIndex()
+    index.upsert('a', 'Villa', '', {'status': 'approved'})
+    index.upsert('b', 'Villa', '', {'status': 'pending'})
+    ranked = index.search('villa', accept=lambda meta: meta['status'] == 'approved')
+    assert [doc_id for _, doc_id in ranked] == ['a']
+
+def test_stopwords_alone_match_nothing():
+    index = InvertedIndex()
+    index.upsert('a', 'The villa', 'in the hills', {})
+    assert index.search('the in') == []
+
+def test_relevance_cursor_pages_without_gaps_or_repeats(client, seller_headers):
+    for number in range(5):
+        client.post('/api/properties', json=property_payload(title=f'Villa {number}', description='villa ' * number), headers=seller_headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {'q': 'villa', 'limit': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/properties', params=params)
+        assert response.status_code == 200
+        seen += [prop['id'] for prop in response.json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    everything = [prop['id'] for prop in client.get('/api/properties', params={'q': 'villa', 'limit': 10}).json()]
+    assert seen == everything
+    assert len(seen) == 5
+
+def test_search_rejects_other_sorts_and_bad_cursors(client):
+    assert client.get('/api/properties', params={'q': 'villa', 'sort': 'price_asc'}).status_code == 400
+    keyset = server.encode_cursor(server.RELEVANCE_SORT, {'score': 'high', 'id': 'x'})
+    assert client.get('/api/properties', params={'q': 'villa', 'cursor': keyset}).status_code == 400